@@ -1,5 +1,5 @@
 import importlib
-from .py import preview_routes
+from .py import preview_routes, input_routes
 
 node_list = [
     "multi_image_select",
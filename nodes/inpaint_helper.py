@@ -1,7 +1,20 @@
-from typing import List, Optional, Tuple
+from typing import Callable, List, Optional, Tuple
+from collections import OrderedDict
 import numpy as np
-from PIL import Image, ImageDraw
+from PIL import Image
 import torch
+import torch.nn.functional as F
+
+try:
+    from comfy import model_management
+except Exception:
+    model_management = None
+
+ENGINE_OPTIONS = ["auto", "torch", "pil"]
+
+# Resized/cropped source pieces kept per call (most recent first); enough for a
+# handful of alternating sources without holding every frame of a moving bbox.
+FIT_MEMO_ENTRIES = 16
 
 # -------------------- tensor <-> PIL helpers --------------------
 
@@ -26,68 +39,6 @@ def _image_tensor_to_pil_list(img: torch.Tensor) -> List[Image.Image]:
             out.append(Image.fromarray(arr, mode="RGBA"))
     return out
 
-def _mask_any_to_pil_list(mask_like: torch.Tensor,
-                          force_size: Optional[Tuple[int,int]] = None) -> List[Image.Image]:
-    """
-    Accept MASK in shapes:
-      - [B,1,H,W] float/uint8 in [0..1] or [0..255]
-      - [B,H,W]   float/uint8
-      - [B,H,W,C] (IMAGE used as mask) -> luminance
-    Return list of single-channel PIL "L" images in 0..255.
-    """
-    if mask_like.dim() == 4 and mask_like.shape[1] == 1:
-        B, _, H, W = mask_like.shape
-        out = []
-        for i in range(B):
-            arr = mask_like[i,0].detach().cpu().numpy()
-            if arr.dtype != np.float32 and arr.dtype != np.float64:
-                arr = arr.astype(np.float32)
-            if arr.max() <= 1.0:
-                arr = (arr * 255.0).clip(0,255)
-            out.append(Image.fromarray(arr.astype(np.uint8), mode="L"))
-        if force_size and out and out[0].size != force_size:
-            out = [im.resize(force_size, Image.NEAREST) for im in out]
-        return out
-
-    if mask_like.dim() == 3:
-        B, H, W = mask_like.shape
-        out = []
-        for i in range(B):
-            arr = mask_like[i].detach().cpu().numpy()
-            if arr.dtype != np.float32 and arr.dtype != np.float64:
-                arr = arr.astype(np.float32)
-            if arr.max() <= 1.0:
-                arr = (arr * 255.0).clip(0,255)
-            out.append(Image.fromarray(arr.astype(np.uint8), mode="L"))
-        if force_size and out and out[0].size != force_size:
-            out = [im.resize(force_size, Image.NEAREST) for im in out]
-        return out
-
-    if mask_like.dim() == 4 and mask_like.shape[-1] in (1,3,4):
-        imgs = _image_tensor_to_pil_list(mask_like)
-        l = [im.convert("L") for im in imgs]
-        if force_size and l and l[0].size != force_size:
-            l = [im.resize(force_size, Image.NEAREST) for im in l]
-        return l
-
-    raise ValueError("MASK must be [B,1,H,W] or [B,H,W] (or an IMAGE used as mask).")
-
-def _pil_list_to_image_tensor(imgs: List[Image.Image]) -> torch.Tensor:
-    batch = []
-    for im in imgs:
-        arr = np.asarray(im.convert("RGB"), dtype=np.uint8).astype(np.float32) / 255.0
-        batch.append(arr)
-    arrb = np.stack(batch, axis=0)
-    return torch.from_numpy(arrb)
-
-def _pil_list_to_mask_tensor(masks: List[Image.Image]) -> torch.Tensor:
-    batch = []
-    for m in masks:
-        arr = np.asarray(m.convert("L"), dtype=np.uint8).astype(np.float32) / 255.0
-        batch.append(arr[None, ...])  # [1,H,W]
-    arrb = np.stack(batch, axis=0)
-    return torch.from_numpy(arrb)
-
 def _resample_from_name(name: str):
     name = (name or "lanczos").lower()
     if name == "bilinear":
@@ -96,13 +47,6 @@ def _resample_from_name(name: str):
         return Image.BICUBIC
     return Image.LANCZOS
 
-def _bbox_from_mask(mask_l: Image.Image, threshold: float = 0.5) -> Optional[Tuple[int,int,int,int]]:
-    arr = np.array(mask_l, dtype=np.uint8)
-    thr = int(round(np.clip(threshold, 0.0, 1.0) * 255))
-    binm = (arr >= thr).astype(np.uint8) * 255
-    pil = Image.fromarray(binm, mode="L")
-    return pil.getbbox()
-
 def _expand_bbox(x0,y0,x1,y1, w,h, pad: int):
     if pad <= 0:
         return x0,y0,x1,y1
@@ -128,6 +72,381 @@ def _alignment_offset(ax: str, ay: str, box_w: int, box_h: int, content_w: int,
     else: oy = (box_h - content_h) // 2
     return ox, oy
 
+# -------------------- torch engine --------------------
+#
+# Batched, tensor-native version of the PIL path below. Both engines share the
+# mask quantisation and bbox helpers so thresholds and bboxes match exactly;
+# resizing uses torch's antialiased bilinear/bicubic in float. PIL resamples
+# 8-bit images in two passes, clipping and rounding in between, so bicubic
+# overshoot on high-frequency content can differ by up to ~0.09 per channel;
+# bilinear and smooth content stay within about 2/255.
+# Full-size buffers (destination, masks, outputs) always live in CPU memory;
+# with use_gpu only the per-frame source resize runs on the compute device, so
+# long 1080p+ batches never have to fit into VRAM.
+
+def _torch_interp_mode(antialias: str) -> str:
+    return "bilinear" if (antialias or "").lower() == "bilinear" else "bicubic"
+
+def _compute_device(use_gpu: bool) -> torch.device:
+    if use_gpu and model_management is not None:
+        try:
+            return model_management.get_torch_device()
+        except Exception:
+            pass
+    return torch.device("cpu")
+
+def _image_to_rgb_tensor(img: torch.Tensor, device: torch.device) -> torch.Tensor:
+    """[B,H,W,C] -> [B,H,W,3] float in [0,1] (alpha dropped, gray expanded)."""
+    if img.dim() != 4 or img.shape[-1] not in (1,3,4):
+        raise ValueError("IMAGE must be [B,H,W,C] with C in {1,3,4}.")
+    t = img.detach().to(device=device, dtype=torch.float32).clamp(0.0, 1.0)
+    if t.shape[-1] == 1:
+        return t.expand(-1, -1, -1, 3)
+    return t[..., :3]
+
+def _mask_any_to_u8_tensor(mask_like: torch.Tensor, force_size: Tuple[int,int],
+                           device: torch.device) -> torch.Tensor:
+    """
+    Accept MASK in shapes:
+      - [B,1,H,W] float/uint8 in [0..1] or [0..255]
+      - [B,H,W]   float/uint8
+      - [B,H,W,C] (IMAGE used as mask) -> luminance
+    Returns [B,H,W] float holding integer 0..255 values (PIL "L" quantisation),
+    nearest-resized to force_size (W,H).
+    """
+    m = mask_like.detach().to(device)
+    if m.dim() == 4 and m.shape[1] == 1:
+        m = m[:, 0].float()
+    elif m.dim() == 3:
+        m = m.float()
+    elif m.dim() == 4 and m.shape[-1] in (1,3,4):
+        u8 = (m.float().clamp(0.0, 1.0) * 255.0).floor()
+        if u8.shape[-1] == 1:
+            m = u8[..., 0]
+        else:
+            # PIL's fixed-point ITU-R 601-2 luma used by convert("L")
+            m = torch.floor((u8[..., 0] * 19595 + u8[..., 1] * 38470 + u8[..., 2] * 7471 + 0x8000) / 65536.0)
+        m = m[:, None]
+    else:
+        raise ValueError("MASK must be [B,1,H,W] or [B,H,W] (or an IMAGE used as mask).")
+
+    if m.dim() == 3:
+        peak = m.flatten(1).amax(dim=1) if m.numel() else m.new_zeros((m.shape[0],))
+        scale = torch.where(peak <= 1.0, 255.0, 1.0).view(-1, 1, 1)
+        m = (m * scale).clamp(0.0, 255.0).floor()[:, None]
+
+    W, H = force_size
+    if m.shape[-2:] != (H, W):
+        m = F.interpolate(m, size=(H, W), mode="nearest-exact")
+    return m[:, 0]
+
+def _bboxes_from_u8_masks(m_u8: torch.Tensor, threshold: float) -> List[Optional[Tuple[int,int,int,int]]]:
+    """Thresholded bounding boxes (x0,y0,x1,y1) per [B,H,W] mask, None if empty."""
+    thr = int(round(float(np.clip(threshold, 0.0, 1.0)) * 255))
+    binm = m_u8 >= thr
+    rows = binm.any(dim=2)
+    cols = binm.any(dim=1)
+    H, W = binm.shape[1], binm.shape[2]
+    has = rows.any(dim=1)
+    y0 = rows.int().argmax(dim=1)
+    y1 = H - rows.flip(1).int().argmax(dim=1)
+    x0 = cols.int().argmax(dim=1)
+    x1 = W - cols.flip(1).int().argmax(dim=1)
+    stacked = torch.stack([x0, y0, x1, y1], dim=1).cpu().tolist()
+    return [tuple(bb) if ok else None for bb, ok in zip(stacked, has.cpu().tolist())]
+
+def _resize_rgba_tensor(src: torch.Tensor, new_w: int, new_h: int, mode: str) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Resize one [H,W,C] source (C in 1/3/4) to (new_h,new_w).
+    Returns (rgb [h,w,3], alpha [h,w,1]); RGBA is resized premultiplied like PIL.
+    """
+    t = src.float().clamp(0.0, 1.0)
+    if t.shape[-1] == 1:
+        t = t.expand(-1, -1, 3)
+    rgb = t[..., :3]
+    alpha = t[..., 3:4] if t.shape[-1] == 4 else None
+
+    x = rgb if alpha is None else torch.cat([rgb * alpha, alpha], dim=-1)
+    x = x.permute(2, 0, 1)[None]
+    if x.shape[-2:] != (new_h, new_w):
+        x = F.interpolate(x, size=(new_h, new_w), mode=mode, align_corners=False, antialias=True)
+    x = x[0].permute(1, 2, 0).clamp(0.0, 1.0)
+
+    if alpha is None:
+        return x, torch.ones_like(x[..., :1])
+    a = x[..., 3:4]
+    rgb = torch.where(a > 0, x[..., :3] / a.clamp_min(1e-12), torch.zeros_like(x[..., :3])).clamp(0.0, 1.0)
+    return rgb, a
+
+def _batch_count(*sizes: int) -> int:
+    """Output batch size: size-1 inputs broadcast, otherwise the shortest wins."""
+    B = max(sizes)
+    return min(B if n == 1 else n for n in sizes)
+
+def _bidx(i: int, n: int) -> int:
+    return 0 if n == 1 else i
+
+def _memo(cache: "OrderedDict", key, build: Callable):
+    """Small per-call LRU: return cache[key], building and inserting it on a miss."""
+    hit = cache.get(key)
+    if hit is not None:
+        cache.move_to_end(key)
+        return hit
+    val = build()
+    cache[key] = val
+    if len(cache) > FIT_MEMO_ENTRIES:
+        cache.popitem(last=False)
+    return val
+
+def _clip_paste(px: int, py: int, fw: int, fh: int, W: int, H: int):
+    """Intersect a paste rect with the canvas; returns (x0,y0,x1,y1,sx,sy) or None."""
+    x0, y0 = max(0, px), max(0, py)
+    x1, y1 = min(W, px + fw), min(H, py + fh)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1, x0 - px, y0 - py
+
+def _placement_key(frame: dict) -> Tuple[int, int, int, int]:
+    return (frame["paste"][0], frame["paste"][1], frame["size"][0], frame["size"][1])
+
+def _composite_torch(source, dst, frames, N, use_source_alpha, antialias, device):
+    """
+    Paste each source frame at its planned size/offset; returns (composite, fitted_only)
+    on the CPU. Only the source frame resize runs on `device`.
+    """
+    interp = _torch_interp_mode(antialias)
+    H, W = int(dst.shape[1]), int(dst.shape[2])
+
+    n_src, n_dst, n_frm = int(source.shape[0]), int(dst.shape[0]), len(frames)
+
+    composite = (dst.expand(N, -1, -1, -1) if n_dst == 1 else dst[:N]).clone()
+    fitted_only = torch.zeros((N, H, W, 3), dtype=torch.float32)
+
+    fitted_memo: "OrderedDict" = OrderedDict()
+    frames_done = {}
+
+    for idx in range(N):
+        frame = frames[_bidx(idx, n_frm)]
+        if frame is None:
+            continue
+        si, di = _bidx(idx, n_src), _bidx(idx, n_dst)
+
+        prev = frames_done.setdefault((si, di, _placement_key(frame)), idx)
+        if prev != idx:
+            composite[idx] = composite[prev]
+            fitted_only[idx] = fitted_only[prev]
+            continue
+
+        (paste_x, paste_y), (new_w, new_h) = frame["paste"], frame["size"]
+        roi = _clip_paste(paste_x, paste_y, new_w, new_h, W, H)
+        if roi is None:
+            continue
+        rx0, ry0, rx1, ry1, sx, sy = roi
+        cw, ch = rx1 - rx0, ry1 - ry0
+
+        def _build():
+            rgb, a = _resize_rgba_tensor(source[si].detach().to(device), new_w, new_h, interp)
+            return rgb[sy:sy + ch, sx:sx + cw].cpu(), a[sy:sy + ch, sx:sx + cw].cpu()
+
+        rgb, a = _memo(fitted_memo, (si, new_w, new_h, sx, sy, cw, ch, interp), _build)
+        if use_source_alpha:
+            region = composite[idx, ry0:ry1, rx0:rx1]
+            composite[idx, ry0:ry1, rx0:rx1] = region * (1.0 - a) + rgb * a
+            fitted_only[idx, ry0:ry1, rx0:rx1] = rgb * a
+        else:
+            composite[idx, ry0:ry1, rx0:rx1] = rgb
+            fitted_only[idx, ry0:ry1, rx0:rx1] = rgb
+
+    return composite, fitted_only
+
+# -------------------- PIL engine --------------------
+#
+# Only the bbox region is resized, pasted and masked; full-size outputs are
+# preallocated tensors that receive ROI writes, so per-frame work scales with
+# the bbox area instead of the canvas area. Pixel values match the original
+# full-canvas PIL implementation exactly (uint8-quantised).
+
+def _quantize_u8(t: torch.Tensor) -> torch.Tensor:
+    """Same rounding as the uint8 round trip through PIL."""
+    return (t.clamp(0.0, 1.0) * 255.0).floor() / 255.0
+
+def _roi_to_pil(roi: torch.Tensor) -> Image.Image:
+    arr = (roi * 255.0).round().to(torch.uint8).numpy()
+    return Image.fromarray(arr, mode="RGB")
+
+def _pil_to_roi(img: Image.Image) -> torch.Tensor:
+    return torch.from_numpy(np.asarray(img.convert("RGB"), dtype=np.uint8).astype(np.float32) / 255.0)
+
+def _composite_pil(source, dst, frames, N, use_source_alpha, antialias):
+    """PIL counterpart of `_composite_torch`; dst must be uint8-quantised on the CPU."""
+    resample = _resample_from_name(antialias)
+    H, W = int(dst.shape[1]), int(dst.shape[2])
+
+    n_src, n_dst, n_frm = int(source.shape[0]), int(dst.shape[0]), len(frames)
+    src_imgs = {}
+
+    composite = (dst.expand(N, -1, -1, -1) if n_dst == 1 else dst[:N]).clone()
+    fitted_only = torch.zeros((N, H, W, 3), dtype=torch.float32)
+
+    fitted_memo: "OrderedDict" = OrderedDict()
+    frames_done = {}
+
+    for idx in range(N):
+        frame = frames[_bidx(idx, n_frm)]
+        if frame is None:
+            continue
+        si, di = _bidx(idx, n_src), _bidx(idx, n_dst)
+
+        prev = frames_done.setdefault((si, di, _placement_key(frame)), idx)
+        if prev != idx:
+            composite[idx] = composite[prev]
+            fitted_only[idx] = fitted_only[prev]
+            continue
+
+        (paste_x, paste_y), (new_w, new_h) = frame["paste"], frame["size"]
+        roi = _clip_paste(paste_x, paste_y, new_w, new_h, W, H)
+        if roi is None:
+            continue
+        rx0, ry0, rx1, ry1, sx, sy = roi
+        cw, ch = rx1 - rx0, ry1 - ry0
+
+        s_img = src_imgs.get(si)
+        if s_img is None:
+            s_img = src_imgs[si] = _image_tensor_to_pil_list(source[si:si + 1])[0]
+
+        def _build():
+            s_rgba = s_img if s_img.mode == "RGBA" else s_img.convert("RGBA")
+            fitted = s_rgba.resize((new_w, new_h), resample=resample)
+            fitted = fitted.crop((sx, sy, sx + cw, sy + ch))
+            fitted_rgb = fitted.convert("RGB")
+            if not use_source_alpha:
+                return fitted_rgb, None, _pil_to_roi(fitted_rgb)
+            alpha = fitted.split()[-1]
+            on_black = Image.new("RGB", fitted.size, (0,0,0))
+            on_black.paste(fitted_rgb, (0, 0), alpha)
+            return fitted_rgb, alpha, _pil_to_roi(on_black)
+
+        fitted_rgb, alpha, fitted_t = _memo(
+            fitted_memo, (si, new_w, new_h, sx, sy, cw, ch, resample), _build)
+
+        if use_source_alpha:
+            region = _roi_to_pil(composite[idx, ry0:ry1, rx0:rx1])
+            region.paste(fitted_rgb, (0, 0), alpha)
+            composite[idx, ry0:ry1, rx0:rx1] = _pil_to_roi(region)
+        else:
+            composite[idx, ry0:ry1, rx0:rx1] = fitted_t
+        fitted_only[idx, ry0:ry1, rx0:rx1] = fitted_t
+
+    return composite, fitted_only
+
+# -------------------- placement plans --------------------
+#
+# A plan is a plain, JSON-serialisable dict so it can be passed between nodes
+# (and saved) without keeping the masks around:
+#   {"version": 1, "canvas": [W, H], "frames": [frame | None, ...]}
+#   frame = {"bbox": [x, y, w, h], "paste": [x, y], "size": [w, h], "scale": [sx, sy]}
+# "bbox" is the padded mask box, "paste"/"size" the fitted source rect (may
+# extend past the canvas), "scale" the source-to-fitted factor per axis.
+
+PLAN_TYPE = "VSLINX_PLACEMENT_PLAN"
+PLAN_VERSION = 1
+
+def _plan_frame(bb, src_w: int, src_h: int, W: int, H: int, mode: str, align_x: str, align_y: str,
+                offset_x: int, offset_y: int, pad: int) -> Optional[dict]:
+    if bb is None:
+        return None
+    x0, y0, x1, y1 = _expand_bbox(*bb, W, H, pad)
+    box_w = max(1, x1 - x0); box_h = max(1, y1 - y0)
+    new_w, new_h = _fit_size(src_w, src_h, box_w, box_h, mode=mode)
+    ax, ay = _alignment_offset(align_x, align_y, box_w, box_h, new_w, new_h)
+    return {
+        "bbox": [int(x0), int(y0), int(box_w), int(box_h)],
+        "paste": [int(x0 + ax + offset_x), int(y0 + ay + offset_y)],
+        "size": [int(new_w), int(new_h)],
+        "scale": [new_w / src_w, new_h / src_h],
+    }
+
+def _plan_from_masks(m_u8: torch.Tensor, N: int, src_w: int, src_h: int, mode, align_x, align_y,
+                     offset_x, offset_y, threshold, pad) -> dict:
+    n_msk, H, W = int(m_u8.shape[0]), int(m_u8.shape[1]), int(m_u8.shape[2])
+    per_mask = [
+        _plan_frame(bb, src_w, src_h, W, H, mode, align_x, align_y, offset_x, offset_y, pad)
+        for bb in _bboxes_from_u8_masks(m_u8[:N] if n_msk > 1 else m_u8, threshold)
+    ]
+    return {
+        "version": PLAN_VERSION,
+        "canvas": [W, H],
+        "frames": [per_mask[_bidx(i, n_msk)] for i in range(N)],
+    }
+
+def _validate_plan(plan) -> List[Optional[dict]]:
+    if not isinstance(plan, dict) or not isinstance(plan.get("frames"), list) or not plan["frames"]:
+        raise ValueError("placement_plan must come from Fit Image into BBox Mask.")
+    if plan.get("version", PLAN_VERSION) != PLAN_VERSION:
+        raise ValueError(f"Unsupported placement_plan version: {plan.get('version')}")
+    return plan["frames"]
+
+def _placed_mask(frames, N: int, W: int, H: int, m_u8: Optional[torch.Tensor] = None) -> torch.Tensor:
+    """
+    [N,1,H,W] mask of each frame's visible paste rect. With `m_u8` the original
+    mask values are kept inside the rect, otherwise the rect is filled with 1.
+    """
+    placed = torch.zeros((N, 1, H, W), dtype=torch.float32)
+    n_frm = len(frames)
+    n_msk = int(m_u8.shape[0]) if m_u8 is not None else 0
+    for idx in range(N):
+        frame = frames[_bidx(idx, n_frm)]
+        if frame is None:
+            continue
+        roi = _clip_paste(frame["paste"][0], frame["paste"][1], frame["size"][0], frame["size"][1], W, H)
+        if roi is None:
+            continue
+        rx0, ry0, rx1, ry1, _sx, _sy = roi
+        if m_u8 is None:
+            placed[idx, 0, ry0:ry1, rx0:rx1] = 1.0
+        else:
+            placed[idx, 0, ry0:ry1, rx0:rx1] = m_u8[_bidx(idx, n_msk), ry0:ry1, rx0:rx1] / 255.0
+    return placed
+
+def _resolve_engine(engine: str, antialias: str) -> str:
+    if engine == "auto":
+        return "pil" if (antialias or "lanczos").lower() == "lanczos" else "torch"
+    return engine
+
+def _destination_tensor(destination, canvas_w: int, canvas_h: int, engine: str) -> torch.Tensor:
+    if destination is None:
+        return torch.zeros((1, canvas_h, canvas_w, 3), dtype=torch.float32)
+    dst = _image_to_rgb_tensor(destination, torch.device("cpu"))
+    return _quantize_u8(dst) if engine == "pil" else dst
+
+def _composite(source, dst, frames, N, use_source_alpha, antialias, engine, device):
+    if engine == "torch":
+        return _composite_torch(source, dst, frames, N, use_source_alpha, antialias, device)
+    return _composite_pil(source, dst, frames, N, use_source_alpha, antialias)
+
+def _fit_into_bbox(source, mask, destination, canvas_w, canvas_h, mode, align_x, align_y,
+                   offset_x, offset_y, threshold, pad, use_source_alpha, antialias, engine, device):
+    dst = _destination_tensor(destination, canvas_w, canvas_h, engine)
+    H, W = int(dst.shape[1]), int(dst.shape[2])
+
+    m_u8 = _mask_any_to_u8_tensor(mask, (W, H), torch.device("cpu"))
+    N = _batch_count(int(source.shape[0]), int(dst.shape[0]), int(m_u8.shape[0]))
+
+    plan = _plan_from_masks(m_u8, N, int(source.shape[2]), int(source.shape[1]),
+                            mode, align_x, align_y, offset_x, offset_y, threshold, pad)
+    frames = plan["frames"]
+    composite, fitted_only = _composite(source, dst, frames, N, use_source_alpha, antialias, engine, device)
+    placed = _placed_mask(frames, N, W, H, m_u8)
+
+    out_x, out_y, out_w, out_h = frames[0]["bbox"] if frames[0] is not None else (0, 0, 0, 0)
+    return (
+        composite,
+        fitted_only,
+        placed,
+        out_x, out_y, out_w, out_h,
+        plan,
+    )
+
 class vsLinx_FitImageIntoBBoxMask:
     DESCRIPTION = "This node fits an image inside the bounding box region of a mask and places it into a destination image (or a blank canvas). It’s useful for workflows where you want to insert or align a smaller image (e.g. pose, object, logo, patch) into a specific masked region while keeping correct proportions. This node does the following:"
     
@@ -151,11 +470,13 @@ class vsLinx_FitImageIntoBBoxMask:
                 "destination": ("IMAGE", {"tooltip": "The image you’re compositing onto. If not provided, a blank canvas is created."}),
                 "canvas_w": ("INT", {"default":1024, "min":16, "max":8192, "step":1, "tooltip": "Canvas width when no destination image is given."}),
                 "canvas_h": ("INT", {"default":1024, "min":16, "max":8192, "step":1, "tooltip": "Canvas height when no destination image is given."}),
+                "engine": (ENGINE_OPTIONS, {"default":"auto", "tooltip": "torch processes the whole batch as tensors (bilinear/bicubic; lanczos falls back to bicubic). pil uses the original per-frame PIL path. auto picks torch unless antialias is lanczos."}),
+                "use_gpu": ("BOOLEAN", {"default":False, "tooltip": "Resize the source frames with the torch engine on ComfyUI's compute device. Full-size images and masks stay in CPU memory, so long batches don't need to fit into VRAM."}),
             }
         }
 
-    RETURN_TYPES = ("IMAGE","IMAGE","MASK","INT","INT","INT","INT")
-    RETURN_NAMES = ("composite","fitted_source","placed_mask","x","y","w","h")
+    RETURN_TYPES = ("IMAGE","IMAGE","MASK","INT","INT","INT","INT",PLAN_TYPE)
+    RETURN_NAMES = ("composite","fitted_source","placed_mask","x","y","w","h","placement_plan")
     FUNCTION = "run"
     CATEGORY = "vsLinx/inpaint"
 
@@ -175,78 +496,70 @@ class vsLinx_FitImageIntoBBoxMask:
         destination: Optional[torch.Tensor] = None,
         canvas_w: int = 1024,
         canvas_h: int = 1024,
+        engine: str = "auto",
+        use_gpu: bool = False,
     ):
-        resample = _resample_from_name(antialias)
-
-        src_list = _image_tensor_to_pil_list(source)
-        if destination is not None:
-            dst_list = _image_tensor_to_pil_list(destination)
-            canvas_size = (dst_list[0].width, dst_list[0].height)
-        else:
-            dst_list = [Image.new("RGB", (canvas_w, canvas_h), (0,0,0))]
-            canvas_size = (canvas_w, canvas_h)
-
-        mask_list = _mask_any_to_pil_list(mask, force_size=canvas_size)
-
-        B = max(len(src_list), len(dst_list), len(mask_list))
-        if len(src_list) == 1 and B > 1: src_list = src_list * B
-        if len(dst_list) == 1 and B > 1: dst_list = dst_list * B
-        if len(mask_list) == 1 and B > 1: mask_list = mask_list * B
-
-        composites, fitted_only, placed_masks = [], [], []
-        out_x = out_y = out_w = out_h = 0
-
-        for idx, (s_img, d_img, m_img) in enumerate(zip(src_list, dst_list, mask_list)):
-            canvas = d_img.copy()
-
-            bb = _bbox_from_mask(m_img, threshold=threshold)
-            if bb is None:
-                composites.append(canvas)
-                fitted_only.append(Image.new("RGB", canvas.size, (0,0,0)))
-                placed_masks.append(Image.new("L", canvas.size, 0))
-                continue
-
-            x0, y0, x1, y1 = _expand_bbox(*bb, canvas.width, canvas.height, pad)
-            box_w = max(1, x1 - x0); box_h = max(1, y1 - y0)
+        engine = _resolve_engine(engine, antialias)
+        device = _compute_device(use_gpu) if engine == "torch" else torch.device("cpu")
+        return _fit_into_bbox(
+            source, mask, destination, canvas_w, canvas_h, mode, align_x, align_y,
+            offset_x, offset_y, threshold, pad, use_source_alpha, antialias, engine, device,
+        )
 
-            src_w, src_h = s_img.width, s_img.height
-            new_w, new_h = _fit_size(src_w, src_h, box_w, box_h, mode=mode)
-            ax, ay = _alignment_offset(align_x, align_y, box_w, box_h, new_w, new_h)
-            paste_x = x0 + ax + offset_x
-            paste_y = y0 + ay + offset_y
+class vsLinx_ApplyPlacementPlan:
+    DESCRIPTION = "Composites a new source batch using a placement plan from Fit Image into BBox Mask, without scanning any masks. Each source frame is resized to the planned size and pasted at the planned position, which makes iterative refine passes over the same placements cheap."
 
-            s_rgba = s_img if s_img.mode == "RGBA" else s_img.convert("RGBA")
-            fitted = s_rgba.resize((new_w, new_h), resample=resample)
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "source": ("IMAGE", {"tooltip": "The image(s) to place. Each frame is resized to the planned size regardless of its own resolution."}),
+                "placement_plan": (PLAN_TYPE, {"tooltip": "The placement_plan output of Fit Image into BBox Mask."}),
+                "use_source_alpha": ("BOOLEAN", {"default":False, "tooltip": "If true, respects transparency in the source image during paste."}),
+                "antialias": (["lanczos","bicubic","bilinear"], {"default":"lanczos", "tooltip": "Resampling method used when resizing the source image."}),
+            },
+            "optional": {
+                "destination": ("IMAGE", {"tooltip": "The image you’re compositing onto. Must match the plan’s canvas size. If not provided, a blank canvas of that size is created."}),
+                "engine": (ENGINE_OPTIONS, {"default":"auto", "tooltip": "torch processes the whole batch as tensors (bilinear/bicubic; lanczos falls back to bicubic). pil uses the per-frame PIL path. auto picks torch unless antialias is lanczos."}),
+                "use_gpu": ("BOOLEAN", {"default":False, "tooltip": "Resize the source frames with the torch engine on ComfyUI's compute device. Full-size images and masks stay in CPU memory, so long batches don't need to fit into VRAM."}),
+            }
+        }
 
-            if use_source_alpha:
-                canvas.paste(fitted.convert("RGB"), (paste_x, paste_y), fitted.split()[-1])
-            else:
-                canvas.paste(fitted.convert("RGB"), (paste_x, paste_y))
-
-            on_black = Image.new("RGB", canvas.size, (0,0,0))
-            if use_source_alpha:
-                on_black.paste(fitted.convert("RGB"), (paste_x, paste_y), fitted.split()[-1])
-            else:
-                on_black.paste(fitted.convert("RGB"), (paste_x, paste_y))
-
-            footprint = Image.new("L", canvas.size, 0)
-            draw = ImageDraw.Draw(footprint)
-            draw.rectangle([paste_x, paste_y, paste_x + new_w - 1, paste_y + new_h - 1], fill=255)
-
-            m_arr = np.array(m_img, dtype=np.uint8)
-            f_arr = np.array(footprint, dtype=np.uint8)
-            placed = Image.fromarray(np.minimum(m_arr, f_arr), mode="L")
-
-            composites.append(canvas); fitted_only.append(on_black); placed_masks.append(placed)
-            if idx == 0:
-                out_x, out_y, out_w, out_h = int(x0), int(y0), int(box_w), int(box_h)
-
-        return (
-            _pil_list_to_image_tensor(composites),
-            _pil_list_to_image_tensor(fitted_only),
-            _pil_list_to_mask_tensor(placed_masks),
-            out_x, out_y, out_w, out_h
-        )
+    RETURN_TYPES = ("IMAGE","IMAGE","MASK")
+    RETURN_NAMES = ("composite","fitted_source","placed_mask")
+    FUNCTION = "run"
+    CATEGORY = "vsLinx/inpaint"
 
-NODE_CLASS_MAPPINGS = {"vsLinx_FitImageIntoBBoxMask": vsLinx_FitImageIntoBBoxMask}
-NODE_DISPLAY_NAME_MAPPINGS = {"vsLinx_FitImageIntoBBoxMask": "Fit Image into BBox Mask"}
+    def run(
+        self,
+        source: torch.Tensor,
+        placement_plan: dict,
+        use_source_alpha: bool = False,
+        antialias: str = "lanczos",
+        destination: Optional[torch.Tensor] = None,
+        engine: str = "auto",
+        use_gpu: bool = False,
+    ):
+        frames = _validate_plan(placement_plan)
+        canvas_w, canvas_h = (int(v) for v in placement_plan["canvas"])
+        engine = _resolve_engine(engine, antialias)
+        device = _compute_device(use_gpu) if engine == "torch" else torch.device("cpu")
+
+        dst = _destination_tensor(destination, canvas_w, canvas_h, engine)
+        H, W = int(dst.shape[1]), int(dst.shape[2])
+        if (W, H) != (canvas_w, canvas_h):
+            raise ValueError(f"destination is {W}x{H} but the placement_plan was made for {canvas_w}x{canvas_h}.")
+
+        N = _batch_count(int(source.shape[0]), int(dst.shape[0]), len(frames))
+        composite, fitted_only = _composite(source, dst, frames, N, use_source_alpha, antialias, engine, device)
+        placed = _placed_mask(frames, N, W, H)
+        return (composite, fitted_only, placed)
+
+NODE_CLASS_MAPPINGS = {
+    "vsLinx_FitImageIntoBBoxMask": vsLinx_FitImageIntoBBoxMask,
+    "vsLinx_ApplyPlacementPlan": vsLinx_ApplyPlacementPlan,
+}
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "vsLinx_FitImageIntoBBoxMask": "Fit Image into BBox Mask",
+    "vsLinx_ApplyPlacementPlan": "Apply Placement Plan",
+}
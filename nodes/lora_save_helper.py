@@ -1,5 +1,9 @@
+import hashlib
+import json
 import math
 import sys
+import threading
+from collections import OrderedDict
 from typing import Any, Iterable
 
 def _log(enabled: bool, *args):
@@ -43,50 +47,174 @@ def _coerce_text_to_str(text) -> tuple[str, bool]:
         return (str(text), True)
     return (text, False)
 
-def _extract_node_id_from_unique_id(unique_id) -> str | None:
-    """
-    Handles unique_id formats like '230:228' (Z-IMG). Returns the left-hand id as a string.
-    """
-    if unique_id is None:
+# Subgraph boundary pseudo-node ids used by the frontend in subgraph definitions.
+SUBGRAPH_INPUT_ID = -10
+SUBGRAPH_OUTPUT_ID = -20
+WORKFLOW_INDEX_CACHE_SIZE = 8
+
+class _GraphIndex:
+    """Lookup tables for one graph (the root workflow or one subgraph definition)."""
+
+    def __init__(self, graph: dict):
+        self.nodes: dict[str, dict] = {}
+        self.titles: dict[str, list] = {}
+        self.input_links: dict[str, dict[str, Any]] = {}
+        # link id -> (origin node id, origin slot)
+        self.link_origin: dict[Any, tuple[Any, int]] = {}
+        # (subgraph output slot) -> link id, for links into the output pseudo-node
+        self.output_links: dict[int, Any] = {}
+        self.input_names: list[str] = [i.get("name") for i in graph.get("inputs", []) or []]
+
+        for lnk in graph.get("links", []) or []:
+            if isinstance(lnk, dict):
+                lid, origin, oslot, target, tslot = (lnk.get("id"), lnk.get("origin_id"), lnk.get("origin_slot"),
+                                                     lnk.get("target_id"), lnk.get("target_slot"))
+            elif isinstance(lnk, (list, tuple)) and len(lnk) >= 5:
+                lid, origin, oslot, target, tslot = lnk[:5]
+            else:
+                continue
+            self.link_origin[lid] = (origin, oslot)
+            if target == SUBGRAPH_OUTPUT_ID:
+                self.output_links[tslot] = lid
+
+        for node in graph.get("nodes", []) or []:
+            nid = node.get("id")
+            self.nodes[str(nid)] = node
+            if "title" in node:
+                self.titles.setdefault(node["title"], []).append(nid)
+            self.input_links[str(nid)] = {
+                i.get("name"): i.get("link") for i in node.get("inputs", []) or [] if i.get("link") is not None
+            }
+            for slot, out in enumerate(node.get("outputs", []) or []):
+                for lnk in out.get("links", []) or []:
+                    self.link_origin.setdefault(lnk, (nid, slot))
+
+class _WorkflowIndex:
+    """Indexes of the root graph (key None) and every subgraph definition (key: subgraph id)."""
+
+    def __init__(self, workflow: dict):
+        self.graphs: dict[Any, _GraphIndex] = {None: _GraphIndex(workflow)}
+        for sub in ((workflow.get("definitions") or {}).get("subgraphs") or []):
+            if isinstance(sub, dict) and sub.get("id") is not None:
+                self.graphs[sub["id"]] = _GraphIndex(sub)
+
+    def subgraph_of(self, node: dict | None) -> _GraphIndex | None:
+        return self.graphs.get(node.get("type")) if node else None
+
+    def locate(self, unique_id) -> tuple[list[tuple[_GraphIndex, str]], _GraphIndex, str] | None:
+        """
+        Walks a unique_id like '230:228' through nested subgraph instances.
+        Returns (parents as (graph, instance id) pairs, graph holding the node, local id).
+        """
+        parts = [p for p in str(unique_id).split(":") if p] if unique_id is not None else []
+        if not parts:
+            return None
+        graph = self.graphs[None]
+        parents = []
+        for part in parts[:-1]:
+            sub = self.subgraph_of(graph.nodes.get(part))
+            if sub is None:
+                return None
+            parents.append((graph, part))
+            graph = sub
+        return parents, graph, parts[-1]
+
+    def resolve_input(self, unique_id, input_name: str):
+        """
+        Follows `input_name` of the node at `unique_id` upstream to the real
+        producing node, crossing subgraph boundaries in both directions.
+        Returns its prompt id ('12' or '230:12') or None.
+        """
+        loc = self.locate(unique_id)
+        if loc is None:
+            return None
+        parents, graph, local_id = loc
+        link = graph.input_links.get(local_id, {}).get(input_name)
+
+        for _ in range(256):  # guards against malformed, cyclic definitions
+            if link is None or link not in graph.link_origin:
+                return None
+            origin, slot = graph.link_origin[link]
+
+            if origin == SUBGRAPH_INPUT_ID:
+                # fed from outside the subgraph: continue at the instance node's input
+                if not parents or not isinstance(slot, int) or not 0 <= slot < len(graph.input_names):
+                    return None
+                name = graph.input_names[slot]
+                graph, instance_id = parents.pop()
+                link = graph.input_links.get(instance_id, {}).get(name)
+                continue
+
+            sub = self.subgraph_of(graph.nodes.get(str(origin)))
+            if sub is not None:
+                # produced inside a nested subgraph: enter it through the output slot
+                parents.append((graph, str(origin)))
+                graph = sub
+                link = sub.output_links.get(slot)
+                continue
+
+            return ":".join([pid for _, pid in parents] + [str(origin)])
         return None
-    s = str(unique_id)
-    return s.split(":", 1)[0] if s else None
 
-def _find_target_node_id(*, workflow: dict, unique_id: int, id: int, node_title: str, debug: bool) -> int | None:
+    def find_title(self, unique_id, title: str):
+        """Prompt id of the first node titled `title`, searching this node's own graph first, then the root."""
+        loc = self.locate(unique_id)
+        if loc is not None:
+            parents, graph, _local = loc
+            ids = graph.titles.get(title)
+            if ids and parents:
+                return ":".join([pid for _, pid in parents] + [str(ids[0])])
+        ids = self.graphs[None].titles.get(title)
+        return ids[0] if ids else None
+
+
+_index_lock = threading.Lock()
+_index_cache: "OrderedDict[str, _WorkflowIndex]" = OrderedDict()
+_last_workflow: tuple[Any, str] | None = None
+
+def _workflow_index(workflow: dict) -> _WorkflowIndex:
+    """
+    Returns the index for `workflow`, built once per workflow content. All nodes
+    of one execution share the same extra_pnginfo dict, so repeated calls with
+    the same object skip even the hashing.
+    """
+    global _last_workflow
+    with _index_lock:
+        if _last_workflow is not None and _last_workflow[0] is workflow:
+            key = _last_workflow[1]
+        else:
+            raw = json.dumps(workflow, sort_keys=True, separators=(",", ":"), default=str)
+            key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+            _last_workflow = (workflow, key)
+
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    index = _WorkflowIndex(workflow)
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > WORKFLOW_INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+def _find_target_node_id(*, workflow: dict, unique_id, id: int, node_title: str, debug: bool):
     """
     Resolution priority:
       1) Follow this node's `powerloraloader_model` link to the upstream node (preferred).
+         Works inside (nested) subgraphs, where unique_id looks like '230:228'.
       2) Fallback to explicit `id` if provided.
       3) Fallback to `node_title` match.
+    Returns the target's prompt id (int or 'outer:inner' string) or None.
     """
-    nodes = workflow.get("nodes", []) or []
+    index = _workflow_index(workflow)
 
     # --- Priority 1: resolve via link on THIS node's `powerloraloader_model` input
-    link_id = None
-    link_to_node_id: dict[int, int] = {}
-    my_node_id_str = _extract_node_id_from_unique_id(unique_id)
-
-    for node in nodes:
-        if (
-            node.get("type") == "vsLinx_AppendLorasFromNodeToString"
-            and my_node_id_str is not None
-            and str(node.get("id")) == my_node_id_str
-            and link_id is None
-        ):
-            for node_input in node.get("inputs", []):
-                if node_input.get("name") == "powerloraloader_model":
-                    link_id = node_input.get("link")
-                    break
-
-        for out in node.get("outputs", []) or []:
-            for lnk in out.get("links", []) or []:
-                link_to_node_id[lnk] = node.get("id")
-
-    if link_id is not None:
-        upstream = link_to_node_id.get(link_id)
-        _log(debug, f"[priority: link] Resolved upstream via link {link_id} -> node id={upstream}")
-        if upstream is not None:
-            return upstream
+    upstream = index.resolve_input(unique_id, "powerloraloader_model")
+    if upstream is not None:
+        _log(debug, f"[priority: link] Resolved upstream of node {unique_id} -> node id={upstream}")
+        return upstream
 
     # --- Priority 2: explicit id
     if id and id != 0:
@@ -95,10 +223,10 @@ def _find_target_node_id(*, workflow: dict, unique_id: int, id: int, node_title:
 
     # --- Priority 3: node title
     if node_title:
-        for node in nodes:
-            if "title" in node and node["title"] == node_title:
-                _log(debug, f"[priority: title] Matched node by title: '{node_title}' -> id={node['id']}")
-                return node["id"]
+        match = index.find_title(unique_id, node_title)
+        if match is not None:
+            _log(debug, f"[priority: title] Matched node by title: '{node_title}' -> id={match}")
+            return match
         _log(debug, f"No node matched title: '{node_title}'")
 
     _log(debug, "Could not resolve target node (no link/id/title match).")
@@ -177,9 +305,17 @@ class vsLinx_AppendLorasFromNodeToString:
     OUTPUT_NODE = False
 
     @classmethod
-    def IS_CHANGED(cls, *, id, node_title, powerloraloader_model, **kwargs):
-        if powerloraloader_model is not None and (id != 0 or node_title != ""):
+    def IS_CHANGED(cls, *, id=0, node_title="", **kwargs):
+        # ComfyUI evaluates IS_CHANGED without the hidden prompt/workflow, so the
+        # LoRA stack isn't visible here. A linked input is still passed (as None),
+        # so the key tells linked from unlinked: run() resolves through the link
+        # first and the upstream loader is already part of the cache signature.
+        # Only a loader found by id/title with no link has to re-run every time.
+        if "powerloraloader_model" in kwargs:
+            return None
+        if id != 0 or node_title != "":
             return float("NaN")
+        return None
 
     def run(
         self,
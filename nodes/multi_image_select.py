@@ -1,5 +1,7 @@
-import os, json, re
-from typing import List, Tuple
+import os, json, re, threading, hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, TypeVar
 import numpy as np
 from PIL import Image, ImageOps
 import torch
@@ -11,25 +13,244 @@ except Exception:
 
 IMG_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff", ".ppm")
 
+# Upper bound for the automatic worker count (workers = 0). Decoding is mostly
+# I/O + zlib/libjpeg work, which releases the GIL, so threads scale well.
+MAX_AUTO_WORKERS = 8
+
+# reducing_gap used for decode-time downscaling when max_side is set (see PIL
+# Image.resize); 3.0 is visually indistinguishable from a plain LANCZOS resize
+# in most cases. Without max_side images are resized with plain LANCZOS.
+REDUCING_GAP = 3.0
+
+# Memory budget (MB) of the process-wide decoded image cache. 0 disables caching.
+IMAGE_CACHE_MB = int(os.environ.get("VSLINX_IMAGE_CACHE_MB", "1024") or 0)
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# Cache key: (abs_path, mtime_ns, size, exif_transposed, target_size, reduced)
+CacheKey = Tuple[str, int, int, bool, Optional[Tuple[int, int]], bool]
+
+class _DecodedImageCache:
+    """
+    Thread-safe LRU cache of decoded [1,H,W,3] float32 tensors with a byte budget.
+    Keys include mtime/size, so overwritten files simply miss and age out.
+    """
+    def __init__(self, budget_bytes: int):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, torch.Tensor]" = OrderedDict()
+        self._bytes = 0
+        self.budget_bytes = max(0, int(budget_bytes))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(abs_path: str, target_size: Optional[Tuple[int, int]] = None, exif_transposed: bool = True,
+                reduced: bool = False) -> CacheKey:
+        st = os.stat(abs_path)
+        return (abs_path, st.st_mtime_ns, st.st_size, exif_transposed, target_size, reduced)
+
+    @staticmethod
+    def _nbytes(t: torch.Tensor) -> int:
+        return t.element_size() * t.nelement()
+
+    def get(self, key: CacheKey) -> Optional[torch.Tensor]:
+        with self._lock:
+            t = self._entries.get(key)
+            if t is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return t
+
+    def put(self, key: CacheKey, t: torch.Tensor):
+        size = self._nbytes(t)
+        with self._lock:
+            if size > self.budget_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._nbytes(old)
+            self._entries[key] = t
+            self._bytes += size
+            self._evict_locked()
+
+    def set_budget(self, budget_bytes: int):
+        with self._lock:
+            self.budget_bytes = max(0, int(budget_bytes))
+            self._evict_locked()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+    def _evict_locked(self):
+        while self._entries and self._bytes > self.budget_bytes:
+            _key, old = self._entries.popitem(last=False)
+            self._bytes -= self._nbytes(old)
+            self.evictions += 1
+
+IMAGE_CACHE = _DecodedImageCache(IMAGE_CACHE_MB * 1024 * 1024)
+
 def _input_root() -> str:
     if get_input_directory:
         return os.path.abspath(get_input_directory())
     return os.path.abspath(os.path.join(os.getcwd(), "input"))
 
-def _pil_to_tensor_bhwc(img: Image.Image) -> torch.Tensor:
+def _prepare_pil(img: Image.Image) -> Image.Image:
     img = ImageOps.exif_transpose(img)
     if img.mode not in ("RGB", "RGBA"):
         img = img.convert("RGB")
-    arr = np.array(img, copy=False)
+    return img
+
+def _pil_to_uint8_hwc(img: Image.Image) -> np.ndarray:
+    """Expects an image that already went through `_prepare_pil`."""
+    arr = np.asarray(img)
     if arr.ndim == 3 and arr.shape[2] == 4:
         arr = arr[:, :, :3]
-    t = torch.from_numpy(arr.astype(np.float32) / 255.0)
-    return t.unsqueeze(0)
+    return arr
 
-def _resize_like(img: Image.Image, w: int, h: int) -> Image.Image:
+def _resize_like(img: Image.Image, w: int, h: int, reducing_gap: Optional[float] = None) -> Image.Image:
     if img.size == (w, h):
         return img
-    return img.resize((w, h), Image.LANCZOS)
+    return img.resize((w, h), Image.LANCZOS, reducing_gap=reducing_gap)
+
+def _resolve_workers(workers: int, count: int) -> int:
+    n = int(workers or 0)
+    if n <= 0:
+        n = min(MAX_AUTO_WORKERS, os.cpu_count() or 1)
+    return max(1, min(n, count))
+
+def _map_ordered(fn: Callable[[_T], _R], items: List[_T], workers: int) -> List[_R]:
+    """
+    Runs `fn` over `items` on a thread pool and returns results in input order.
+    Falls back to a plain loop for a single worker/item.
+    """
+    n = _resolve_workers(workers, len(items))
+    if n <= 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="vslinx_load") as pool:
+        return list(pool.map(fn, items))
+
+# EXIF orientations that swap width and height (transpose/rotate 90/270).
+_SWAPPING_ORIENTATIONS = (5, 6, 7, 8)
+
+def _orientation_swaps(im: Image.Image) -> bool:
+    try:
+        return im.getexif().get(0x0112) in _SWAPPING_ORIENTATIONS
+    except Exception:
+        return False
+
+def _probe_size(abs_path: str) -> Tuple[int, int]:
+    """
+    Returns the (width, height) the image will have after EXIF transposing,
+    reading only the header.
+    """
+    with Image.open(abs_path) as im:
+        w, h = im.size
+        if _orientation_swaps(im):
+            w, h = h, w
+    return w, h
+
+def _cap_size(size: Tuple[int, int], max_side: int) -> Tuple[int, int]:
+    """Scales `size` down (never up) so its longer side is at most `max_side`."""
+    w, h = size
+    if max_side <= 0 or max(w, h) <= max_side:
+        return w, h
+    s = max_side / max(w, h)
+    return max(1, int(round(w * s))), max(1, int(round(h * s)))
+
+def _draft_for(im: Image.Image, target_size: Tuple[int, int]):
+    """
+    Lets libjpeg decode JPEGs at 1/2, 1/4 or 1/8 scale as long as the result
+    still covers `target_size`. No-op for other formats.
+    """
+    if im.format != "JPEG":
+        return
+    tw, th = target_size
+    if _orientation_swaps(im):
+        tw, th = th, tw
+    try:
+        im.draft(None, (tw, th))
+    except Exception:
+        pass
+
+def _decode_uint8(abs_path: str, target_size: Optional[Tuple[int, int]] = None, reduced: bool = False) -> np.ndarray:
+    """
+    Decodes one file, optionally resized to `target_size`. `reduced` (max_side
+    downscaling) allows JPEG draft decoding and a reducing_gap resize.
+    """
+    with Image.open(abs_path) as pil:
+        if target_size is not None and reduced:
+            _draft_for(pil, target_size)
+        img = _prepare_pil(pil)
+        if target_size is not None:
+            img = _resize_like(img, *target_size, reducing_gap=REDUCING_GAP if reduced else None)
+        return _pil_to_uint8_hwc(img)
+
+def _load_tensor(abs_path: str, target_size: Optional[Tuple[int, int]] = None, reduced: bool = False) -> torch.Tensor:
+    """
+    Decodes one file to a [1,H,W,3] tensor (optionally resized to `target_size`),
+    going through the decoded image cache.
+    """
+    use_cache = IMAGE_CACHE.budget_bytes > 0
+    if use_cache:
+        key = IMAGE_CACHE.key_for(abs_path, target_size, reduced=reduced)
+        cached = IMAGE_CACHE.get(key)
+        if cached is not None:
+            # Downstream nodes may modify outputs in place; never hand out the cached tensor.
+            return cached.clone()
+
+    arr = _decode_uint8(abs_path, target_size, reduced)
+    t = torch.from_numpy(arr.astype(np.float32) / 255.0).unsqueeze(0)
+
+    if use_cache:
+        IMAGE_CACHE.put(key, t.clone())
+    return t
+
+def _load_into(abs_path: str, dst: torch.Tensor, target_size: Tuple[int, int], reduced: bool = False):
+    """
+    Decodes one file straight into `dst` (a [H,W,3] float32 slice of a
+    preallocated batch), going through the decoded image cache.
+    """
+    use_cache = IMAGE_CACHE.budget_bytes > 0
+    if use_cache:
+        key = IMAGE_CACHE.key_for(abs_path, target_size, reduced=reduced)
+        cached = IMAGE_CACHE.get(key)
+        if cached is not None:
+            dst.copy_(cached[0])
+            return
+
+    arr = _decode_uint8(abs_path, target_size, reduced)
+    np.divide(arr, np.float32(255.0), out=dst.numpy())
+    del arr
+
+    if use_cache:
+        IMAGE_CACHE.put(key, dst.unsqueeze(0).clone())
+
+def _try_load_tensor(abs_path: str, target_size: Optional[Tuple[int, int]] = None, max_side: int = 0) -> Tuple[Optional[torch.Tensor], Optional[Exception]]:
+    try:
+        if target_size is None and max_side > 0:
+            size = _probe_size(abs_path)
+            capped = _cap_size(size, max_side)
+            target_size = capped if capped != size else None
+        return _load_tensor(abs_path, target_size, reduced=max_side > 0), None
+    except Exception as e:
+        return None, e
 
 def _parse_paths(s: str) -> List[str]:
     s = (s or "").strip()
@@ -43,6 +264,21 @@ def _parse_paths(s: str) -> List[str]:
         pass
     return [line.strip() for line in s.splitlines() if line.strip()]
 
+def _resolve_input_path(rel: str, root: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve one relative path against the input root and clamp it to the root.
+    Returns the absolute path if it is an existing file with a known image
+    extension, otherwise None.
+    """
+    if root is None:
+        root = os.path.abspath(_input_root()) + os.sep
+    ext_ok = os.path.splitext(rel)[1].lower() in IMG_EXTS
+    abs_path = os.path.abspath(os.path.join(root, rel))
+    in_root = abs_path.startswith(root)
+    if not (ext_ok and in_root and os.path.isfile(abs_path)):
+        return None
+    return abs_path
+
 def _resolve_existing(rels: List[str]) -> Tuple[List[str], List[str]]:
     """
     Resolve relative paths against the input root, clamp to root,
@@ -53,10 +289,8 @@ def _resolve_existing(rels: List[str]) -> Tuple[List[str], List[str]]:
     existing: List[str] = []
     missing: List[str] = []
     for rel in rels:
-        ext_ok = os.path.splitext(rel)[1].lower() in IMG_EXTS
-        abs_path = os.path.abspath(os.path.join(root, rel))
-        in_root = abs_path.startswith(root)
-        if not (ext_ok and in_root and os.path.isfile(abs_path)):
+        abs_path = _resolve_input_path(rel, root)
+        if abs_path is None:
             missing.append(rel)
             continue
         existing.append(abs_path)
@@ -74,6 +308,45 @@ def _fail_if_needed(existing_count: int, missing: List[str], fail_if_empty: bool
             f"{node_name}: No valid images found. They may have been moved or deleted from the input folder.{hint}"
         )
 
+def _select_chunk(paths: List[str], chunk_size: int, chunk_index: int, fail_if_empty: bool, node_name: str) -> List[str]:
+    """
+    Returns the `chunk_index`-th slice of `chunk_size` paths, or all paths if
+    chunking is disabled (chunk_size <= 0).
+    """
+    chunk_size = int(chunk_size or 0)
+    if chunk_size <= 0:
+        return paths
+    chunk_count = (len(paths) + chunk_size - 1) // chunk_size
+    start = max(0, int(chunk_index or 0)) * chunk_size
+    chunk = paths[start:start + chunk_size]
+    if not chunk and fail_if_empty:
+        raise RuntimeError(
+            f"{node_name}: chunk_index {chunk_index} is out of range ({len(paths)} images in {chunk_count} chunks of {chunk_size})."
+        )
+    return chunk
+
+def _fingerprint_selection(selected_paths: str, filename_handling: str) -> str:
+    """
+    Cheap IS_CHANGED fingerprint: the resolved paths' (mtime_ns, size) plus the
+    filename handling. Overwritten, deleted or restored files change the value
+    without hashing any file contents.
+    """
+    rels = _parse_paths(selected_paths)
+    seen = set(); rels = [r for r in rels if not (r in seen or seen.add(r))]
+    existing, missing = _resolve_existing(rels)
+
+    h = hashlib.sha256()
+    h.update(str(filename_handling).encode("utf-8"))
+    for abs_path in existing:
+        try:
+            st = os.stat(abs_path)
+            h.update(f"\0{abs_path}\0{st.st_mtime_ns}\0{st.st_size}".encode("utf-8"))
+        except OSError:
+            h.update(f"\0{abs_path}\0missing".encode("utf-8"))
+    for rel in missing:
+        h.update(f"\0{rel}\0missing".encode("utf-8"))
+    return h.hexdigest()
+
 FILENAME_HANDLING_OPTIONS = ("full filename", "deduped filename")
 
 def _name_for_output(abs_path: str, handling: str) -> str:
@@ -113,6 +386,16 @@ class VSLinx_LoadSelectedImagesList:
                 "fail_if_empty": ("BOOLEAN", {"default": True}),
                 "filename_handling": (FILENAME_HANDLING_OPTIONS, {"default": "full filename"}),
             },
+            "optional": {
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1,
+                                    "tooltip": "Number of threads used to decode images. 0 picks a value based on the CPU count."}),
+                "chunk_size": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1,
+                                       "tooltip": "Only load N images per run. 0 loads the whole selection."}),
+                "chunk_index": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1,
+                                        "tooltip": "Which chunk of chunk_size images to load (0-based)."}),
+                "max_side": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8,
+                                     "tooltip": "Downscale images so their longer side is at most this many pixels, decoding large files at reduced resolution. 0 keeps the original size."}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", "STRING")
@@ -121,11 +404,19 @@ class VSLinx_LoadSelectedImagesList:
     FUNCTION = "load"
     CATEGORY = "vsLinx/image"
 
+    @classmethod
+    def IS_CHANGED(cls, selected_paths: str = "", filename_handling: str = "full filename", **kwargs):
+        return _fingerprint_selection(selected_paths, filename_handling)
+
     def load(
         self,
         selected_paths: str = "",
         fail_if_empty: bool = True,
         filename_handling: str = "full filename",
+        workers: int = 0,
+        chunk_size: int = 0,
+        chunk_index: int = 0,
+        max_side: int = 0,
         **kwargs
     ):
         if not selected_paths:
@@ -141,15 +432,20 @@ class VSLinx_LoadSelectedImagesList:
         existing, missing = _resolve_existing(rels)
         _fail_if_needed(len(existing), missing, fail_if_empty, "Load (Multiple) Images (List)")
 
+        existing = _select_chunk(existing, chunk_size, chunk_index, fail_if_empty, "Load (Multiple) Images (List)")
+        if not existing:
+            return ([], [])
+
         images: List[torch.Tensor] = []
         names: List[str] = []
-        for abs_path in existing:
-            try:
-                pil = Image.open(abs_path)
-                images.append(_pil_to_tensor_bhwc(pil))
-                names.append(_name_for_output(abs_path, filename_handling))
-            except Exception as e:
-                print(f"[vsLinx_LoadSelectedImagesList] skip {abs_path}: {e}")
+        max_side = int(max_side or 0)
+        decoded = _map_ordered(lambda p: _try_load_tensor(p, max_side=max_side), existing, workers)
+        for abs_path, (tensor, err) in zip(existing, decoded):
+            if err is not None:
+                print(f"[vsLinx_LoadSelectedImagesList] skip {abs_path}: {err}")
+                continue
+            images.append(tensor)
+            names.append(_name_for_output(abs_path, filename_handling))
 
         if not images:
             _fail_if_needed(0, rels, fail_if_empty, "Load (Multiple) Images (List)")
@@ -178,6 +474,16 @@ class VSLinx_LoadSelectedImagesBatch:
                 "fail_if_empty": ("BOOLEAN", {"default": True}),
                 "filename_handling": (FILENAME_HANDLING_OPTIONS, {"default": "full filename"}),
             },
+            "optional": {
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1,
+                                    "tooltip": "Number of threads used to decode images. 0 picks a value based on the CPU count."}),
+                "chunk_size": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1,
+                                       "tooltip": "Only load N images per run. 0 loads the whole selection."}),
+                "chunk_index": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1,
+                                        "tooltip": "Which chunk of chunk_size images to load (0-based)."}),
+                "max_side": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8,
+                                     "tooltip": "Downscale images so their longer side is at most this many pixels, decoding large files at reduced resolution. 0 keeps the original size."}),
+            },
         }
 
     RETURN_TYPES = ("IMAGE", "STRING")
@@ -185,11 +491,19 @@ class VSLinx_LoadSelectedImagesBatch:
     FUNCTION = "load_batch"
     CATEGORY = "vsLinx/image"
 
+    @classmethod
+    def IS_CHANGED(cls, selected_paths: str = "", filename_handling: str = "full filename", **kwargs):
+        return _fingerprint_selection(selected_paths, filename_handling)
+
     def load_batch(
         self,
         selected_paths: str = "",
         fail_if_empty: bool = True,
         filename_handling: str = "full filename",
+        workers: int = 0,
+        chunk_size: int = 0,
+        chunk_index: int = 0,
+        max_side: int = 0,
         **kwargs
     ):
         if not selected_paths:
@@ -206,25 +520,62 @@ class VSLinx_LoadSelectedImagesBatch:
         existing, missing = _resolve_existing(rels)
         _fail_if_needed(len(existing), missing, fail_if_empty, "Load (Multiple) Images (Batch)")
 
-        pil_images: List[Image.Image] = []
-        names: List[str] = []
+        target_size: Optional[Tuple[int, int]] = None
         for abs_path in existing:
             try:
-                pil_images.append(Image.open(abs_path))
-                names.append(_name_for_output(abs_path, filename_handling))
+                target_size = _cap_size(_probe_size(abs_path), int(max_side or 0))
+                break
+            except Exception:
+                continue
+
+        if target_size is None:
+            for abs_path in existing:
+                print(f"[vsLinx_LoadSelectedImagesBatch] skip {abs_path}: unreadable image header")
+            _fail_if_needed(0, rels, fail_if_empty, "Load (Multiple) Images (Batch)")
+            empty = torch.zeros((0, 64, 64, 3), dtype=torch.float32)
+            return (empty, "")
+
+        # The size is probed on the whole selection so every chunk shares it.
+        existing = _select_chunk(existing, chunk_size, chunk_index, fail_if_empty, "Load (Multiple) Images (Batch)")
+        if not existing:
+            empty = torch.zeros((0, 64, 64, 3), dtype=torch.float32)
+            return (empty, "")
+
+        # One output tensor for the whole batch; every image is decoded straight
+        # into its slice and released, so peak memory stays around one batch.
+        W0, H0 = target_size
+        reduced = int(max_side or 0) > 0
+        batch = torch.empty((len(existing), H0, W0, 3), dtype=torch.float32)
+
+        def _fill(i: int) -> Optional[Exception]:
+            try:
+                _load_into(existing[i], batch[i], target_size, reduced=reduced)
+                return None
             except Exception as e:
-                print(f"[vsLinx_LoadSelectedImagesBatch] skip {abs_path}: {e}")
+                return e
 
-        if not pil_images:
+        errors = _map_ordered(_fill, list(range(len(existing))), workers)
+        keep: List[int] = []
+        names: List[str] = []
+        for i, (abs_path, err) in enumerate(zip(existing, errors)):
+            if err is not None:
+                print(f"[vsLinx_LoadSelectedImagesBatch] skip {abs_path}: {err}")
+                continue
+            keep.append(i)
+            names.append(_name_for_output(abs_path, filename_handling))
+
+        if not keep:
             _fail_if_needed(0, rels, fail_if_empty, "Load (Multiple) Images (Batch)")
             empty = torch.zeros((0, 64, 64, 3), dtype=torch.float32)
             return (empty, "")
 
-        W0, H0 = pil_images[0].size
-        pil_images = [_resize_like(im, W0, H0) for im in pil_images]
-
-        tensors = [_pil_to_tensor_bhwc(im) for im in pil_images]
-        batch = torch.cat(tensors, dim=0)
+        if len(keep) < len(existing):
+            # Compact in place (keep is ascending, so every copy moves a slice
+            # forward) instead of gathering into a second full-size batch.
+            for j, i in enumerate(keep):
+                if i != j:
+                    batch[j].copy_(batch[i])
+            batch = batch[:len(keep)]
 
         filenames_str = ", ".join(names)
         return (batch, filenames_str)
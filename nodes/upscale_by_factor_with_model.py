@@ -1,7 +1,255 @@
+import inspect
+import math
+import time
+import weakref
 import torch
 from comfy import model_management
+import comfy.model_patcher
 import comfy.utils
 
+from ..py.upscale_cache import _load_cached_upscale, _store_upscale, _upscale_cache_key
+
+TILE_OVERLAP = 8
+MIN_TILE = 128
+MAX_TILE = 2048
+TILE_STEP = 32
+# Working memory per input pixel of a tile and per unit of model scale (the
+# estimate ComfyUI's own "Upscale Image (using Model)" node uses).
+TILE_BYTES_PER_PIXEL = 3 * 384
+MAX_MODEL_PASSES = 3
+PLANNING_MODES = ["auto", "native"]
+PRECISION_OPTIONS = ["fp32", "fp16", "bf16"]
+RESIDENCY_OPTIONS = ["always unload", "keep loaded"]
+
+_patchers: "weakref.WeakKeyDictionary[object, comfy.model_patcher.ModelPatcher]" = weakref.WeakKeyDictionary()
+
+
+def _tile_memory(tile: int, element_size: int, scale: float) -> int:
+    return int(tile * tile * element_size * max(scale, 1.0) * TILE_BYTES_PER_PIXEL)
+
+
+def _pick_tile_size(free_bytes: int, element_size: int, scale: float, width: int, height: int) -> int:
+    """Largest tile (multiple of TILE_STEP) whose estimated working set fits in free_bytes."""
+    per_px = element_size * max(scale, 1.0) * TILE_BYTES_PER_PIXEL
+    tile = int(math.sqrt(max(free_bytes, 0) / per_px))
+    # no point in tiles larger than the image itself
+    tile = min(tile, MAX_TILE, -(-max(width, height) // TILE_STEP) * TILE_STEP)
+    return max(MIN_TILE, tile // TILE_STEP * TILE_STEP)
+
+
+def _model_patcher(upscale_model, device):
+    """
+    ModelPatcher around the model's torch module, created once per model object
+    so ComfyUI's loaded-model list recognises the device copy between calls.
+    """
+    try:
+        patcher = _patchers.get(upscale_model)
+    except TypeError:
+        patcher = None
+    if patcher is None or patcher.load_device != device:
+        patcher = comfy.model_patcher.ModelPatcher(
+            getattr(upscale_model, "model", upscale_model),
+            load_device=device,
+            offload_device=model_management.unet_offload_device(),
+        )
+        try:
+            _patchers[upscale_model] = patcher
+        except TypeError:
+            pass
+    return patcher
+
+
+def _load_model(patcher, memory_required: int):
+    """
+    Loads the weights through ComfyUI, so they count against its memory budget
+    and other models' loads can evict them. Always a full load: upscale models
+    aren't built from comfy.ops, so partial (lowvram) loading can't cast them.
+    """
+    if "force_full_load" in inspect.signature(model_management.load_models_gpu).parameters:
+        model_management.load_models_gpu([patcher], memory_required=memory_required, force_full_load=True)
+    else:
+        model_management.load_models_gpu([patcher], memory_required=memory_required)
+
+
+def _unload_model(patcher):
+    """Removes the weights from ComfyUI's loaded models and moves them to the offload device."""
+    for i, loaded in enumerate(model_management.current_loaded_models):
+        if loaded.model is patcher:
+            model_management.current_loaded_models.pop(i).model_unload()
+            break
+    model_management.soft_empty_cache()
+
+
+def _plan_passes(old_w: int, old_h: int, new_w: int, new_h: int, scale: float, planning: str = "native"):
+    """
+    Returns the input size (w, h) of every model pass.
+    native: one pass on the original image. auto: the first pass always sees the
+    full-resolution input; further passes are chained while the factor exceeds
+    the model scale, and the input of the last pass is downscaled (never
+    upscaled) to target/scale so the model doesn't compute pixels the final
+    resize would throw away.
+    """
+    if planning != "auto":
+        return [(old_w, old_h)]
+    factor = max(new_w / old_w, new_h / old_h)
+    if scale <= 1.0 or factor <= scale:
+        passes = 1
+    else:
+        passes = min(MAX_MODEL_PASSES, math.ceil(math.log(factor) / math.log(scale) - 1e-9))
+
+    sizes = [(old_w, old_h)]
+    for _ in range(passes - 1):
+        w, h = sizes[-1]
+        sizes.append((round(w * scale), round(h * scale)))
+    w, h = sizes[-1]
+    sizes[-1] = (min(w, max(1, round(new_w / scale))), min(h, max(1, round(new_h / scale))))
+    return sizes
+
+
+def _autocast_dtype(upscale_model, precision: str, device):
+    """torch dtype to autocast to, or None for plain fp32."""
+    if precision == "fp16" and device.type == "cpu":
+        precision = "bf16"  # CPU autocast is only fast/supported for bfloat16
+    if precision == "fp16" and getattr(upscale_model, "supports_half", True):
+        return torch.float16
+    if precision == "bf16" and getattr(upscale_model, "supports_bfloat16", True):
+        return torch.bfloat16
+    if precision != "fp32":
+        print(f"[vsLinx_UpscaleByFactorWithModel] model does not support {precision}, using fp32")
+    return None
+
+
+def _model_fn(upscale_model, dtype):
+    if dtype is None:
+        return lambda a: upscale_model(a)
+
+    def run(a):
+        with torch.autocast(device_type=a.device.type, dtype=dtype):
+            return upscale_model(a).float()
+    return run
+
+
+def _tile_positions(size: int, tile: int, overlap: int):
+    """
+    (start, length) of every tile along one axis, placed like comfy.utils.tiled_scale:
+    starts step by tile - overlap and the tiles at the far edge are clipped.
+    """
+    if size <= tile:
+        return [(0, size)]
+    positions = []
+    for it in range(0, size - overlap, tile - overlap):
+        pos = max(0, min(size - overlap, it))
+        positions.append((pos, min(tile, size - pos)))
+    return positions
+
+
+def _feather_mask(h: int, w: int, feather: int) -> torch.Tensor:
+    """Blend weights like comfy.utils.tiled_scale: linear ramp over `feather` px at both ends of each longer axis."""
+    mask = torch.ones((1, 1, h, w))
+    for dim, n in ((2, h), (3, w)):
+        if feather >= n:
+            continue
+        for t in range(feather):
+            a = (t + 1) / feather
+            mask.narrow(dim, t, 1).mul_(a)
+            mask.narrow(dim, n - 1 - t, 1).mul_(a)
+    return mask
+
+
+@torch.inference_mode()
+def _tiled_scale_batched(samples: torch.Tensor, fn, tile: int, overlap: int, scale: float, tile_batch: int) -> torch.Tensor:
+    """
+    comfy.utils.tiled_scale with the same tile placement and blending, but up
+    to `tile_batch` consecutive tiles of equal size go through one forward call.
+    Results are accumulated in comfy's order, so only the grouping differs.
+    Returns the [B,C,H*scale,W*scale] result on the CPU.
+    """
+    B, _C, H, W = samples.shape
+    out_h, out_w = round(H * scale), round(W * scale)
+    feather = round(overlap * scale)
+    positions = [(y, th, x, tw) for y, th in _tile_positions(H, tile, overlap) for x, tw in _tile_positions(W, tile, overlap)]
+
+    groups = []
+    for p in positions:
+        g = groups[-1] if groups else None
+        if g is not None and len(g) < tile_batch and (g[0][1], g[0][3]) == (p[1], p[3]):
+            g.append(p)
+        else:
+            groups.append([p])
+
+    out = None
+    for b in range(B):
+        s = samples[b:b + 1]
+        if H <= tile and W <= tile:
+            res = fn(s).float().cpu()
+            if out is None:
+                out = torch.empty((B, res.shape[1], out_h, out_w))
+            out[b] = res[0]
+            continue
+
+        acc = weight = None
+        masks = {}
+        for group in groups:
+            tiles = torch.cat([s[:, :, y:y + th, x:x + tw] for y, th, x, tw in group])
+            res = fn(tiles).float().cpu()
+            if acc is None:
+                acc = torch.zeros((1, res.shape[1], out_h, out_w))
+                weight = torch.zeros((1, 1, out_h, out_w))
+            oth, otw = int(res.shape[2]), int(res.shape[3])
+            mask = masks.get((oth, otw))
+            if mask is None:
+                mask = masks[(oth, otw)] = _feather_mask(oth, otw, feather)
+            for k, (y, _th, x, _tw) in enumerate(group):
+                oy, ox = round(y * scale), round(x * scale)
+                acc[:, :, oy:oy + oth, ox:ox + otw].add_(res[k:k + 1] * mask)
+                weight[:, :, oy:oy + oth, ox:ox + otw].add_(mask)
+        if out is None:
+            out = torch.empty((B, acc.shape[1], out_h, out_w))
+        out[b] = (acc / weight)[0]
+    return out
+
+
+def _tiled_upscale(upscale_model, in_img: torch.Tensor, scale: float, device,
+                   tile_batch: int = 1, precision: str = "fp32", log: bool = True):
+    """
+    One model pass over a [B,C,H,W] batch; returns (result on the CPU, tile count).
+    Tile size comes from free memory; on OOM the tile batch is halved first,
+    then the tile size.
+    """
+    fn = _model_fn(upscale_model, _autocast_dtype(upscale_model, precision, device))
+    tile_batch = max(1, int(tile_batch))
+    tile = _pick_tile_size(
+        model_management.get_free_memory(device) // tile_batch,
+        in_img.element_size(), scale, int(in_img.shape[-1]), int(in_img.shape[-2]),
+    )
+    B, H, W = int(in_img.shape[0]), int(in_img.shape[-2]), int(in_img.shape[-1])
+    while True:
+        if log:
+            print(f"[vsLinx_UpscaleByFactorWithModel] tile {tile}px, overlap {TILE_OVERLAP}px, "
+                  f"{tile_batch} tile(s) per batch, {precision} on {device}")
+        try:
+            if tile_batch > 1:
+                s = _tiled_scale_batched(in_img, fn, tile, TILE_OVERLAP, scale, tile_batch)
+            else:
+                s = comfy.utils.tiled_scale(
+                    in_img,
+                    fn,
+                    tile_x=tile,
+                    tile_y=tile,
+                    overlap=TILE_OVERLAP,
+                    upscale_amount=scale,
+                )
+            tiles = B * comfy.utils.get_tiled_scale_steps(W, H, tile, tile, TILE_OVERLAP)
+            return torch.clamp(s, min=0.0, max=1.0), tiles
+        except model_management.OOM_EXCEPTION:
+            if tile_batch > 1:
+                tile_batch //= 2
+            elif tile // 2 >= MIN_TILE:
+                tile //= 2
+            else:
+                raise
+            model_management.soft_empty_cache()
+            print(f"[vsLinx_UpscaleByFactorWithModel] out of memory, retrying with {tile}px tiles, {tile_batch} per batch")
 
 class VSLinx_UpscaleByFactorWithModel:
     upscale_methods = ["nearest-exact", "bilinear", "area"]
@@ -14,6 +262,13 @@ class VSLinx_UpscaleByFactorWithModel:
                 "image": ("IMAGE",),
                 "upscale_method": (cls.upscale_methods,),
                 "factor": ("FLOAT", {"default": 2.0, "min": 0.1, "max": 8.0, "step": 0.1}),
+            },
+            "optional": {
+                "residency": (RESIDENCY_OPTIONS, {"default": "always unload", "tooltip": "What happens to the model weights after the upscale. always unload moves them off the device right away. keep loaded leaves them loaded for the next call (e.g. the next image of a list); they are tracked by ComfyUI's memory management like any other model, so they are unloaded when e.g. the sampler needs the memory."}),
+                "tile_batch": ("INT", {"default": 1, "min": 1, "max": 64, "step": 1, "tooltip": "Number of tiles sent through the model in one forward call. Higher values cut per-call overhead (tile size shrinks to fit the memory budget). 1 uses ComfyUI's standard tiled upscale."}),
+                "precision": (PRECISION_OPTIONS, {"default": "fp32", "tooltip": "Autocast precision for the model. fp16/bf16 are faster on most GPUs; on the CPU fp16 falls back to bf16. Falls back to fp32 if the model doesn't support it."}),
+                "planning": (PLANNING_MODES, {"default": "native", "tooltip": "native runs the model once at its own scale and resizes the result. auto downscales the model input when factor is below the model scale (less compute), and chains model passes when it is above (more detail, more compute); the first pass always sees the full-resolution input."}),
+                "disk_cache": ("BOOLEAN", {"default": False, "tooltip": "Store results on disk (8-bit, compressed) and reuse them for identical input, model and settings, even after a restart. Hits skip the model entirely."}),
             }
         }
 
@@ -22,38 +277,77 @@ class VSLinx_UpscaleByFactorWithModel:
     FUNCTION = "upscale"
     CATEGORY = "vsLinx/image"
 
-    def upscale(self, upscale_model, image, upscale_method, factor):
+    def upscale(self, upscale_model, image, upscale_method, factor, residency="always unload",
+                tile_batch=1, precision="fp32", planning="native", disk_cache=False):
         device = model_management.get_torch_device()
-        upscale_model.to(device)
+        scale = float(upscale_model.scale)
 
-        try:
-            in_img = image.movedim(-1, -3).to(device)
-            s = comfy.utils.tiled_scale(
-                in_img,
-                lambda a: upscale_model(a),
-                tile_x=128 + 64,
-                tile_y=128 + 64,
-                overlap=8,
-                upscale_amount=upscale_model.scale,
+        old_w = int(image.shape[2])
+        old_h = int(image.shape[1])
+        new_w = max(1, int(old_w * float(factor)))
+        new_h = max(1, int(old_h * float(factor)))
+
+        cache_key = None
+        if disk_cache:
+            cache_key = _upscale_cache_key(
+                image, upscale_model,
+                factor=float(factor), upscale_method=upscale_method, planning=planning, precision=precision,
             )
-            upscaled = torch.clamp(s.movedim(-3, -1), min=0.0, max=1.0)
+            cached = _load_cached_upscale(cache_key)
+            if cached is not None:
+                print(f"[vsLinx_UpscaleByFactorWithModel] disk cache hit {cache_key[:12]}")
+                return (cached,)
+
+        pass_sizes = _plan_passes(old_w, old_h, new_w, new_h, scale, planning)
+        passes = len(pass_sizes)
+        print(f"[vsLinx_UpscaleByFactorWithModel] plan: input {old_w}x{old_h}, {passes} model pass(es) at {scale:g}x "
+              f"on {', '.join(f'{w}x{h}' for w, h in pass_sizes)}, resize to {new_w}x{new_h}")
+
+        # ComfyUI makes room for the weights (a no-op when they are still
+        # loaded) plus one input image and at least a minimum-size tile
+        memory_required = _tile_memory(MIN_TILE, image.element_size(), scale)
+        memory_required += max(w * h for w, h in pass_sizes) * int(image.shape[3]) * image.element_size()
+        patcher = _model_patcher(upscale_model, device)
+        _load_model(patcher, memory_required)
+
+        try:
+            # one image at a time: only a single item (and its upscaled
+            # intermediate) is ever on the device, results go to a CPU batch
+            batch = int(image.shape[0])
+            pbar = comfy.utils.ProgressBar(batch * passes)
+            out = None
+            tiles_total = 0
+            started = time.perf_counter()
+
+            for b in range(batch):
+                model_management.throw_exception_if_processing_interrupted()
+                samples = image[b:b + 1].movedim(-1, -3)
 
-            old_w = int(image.shape[2])
-            old_h = int(image.shape[1])
-            new_w = max(1, int(old_w * float(factor)))
-            new_h = max(1, int(old_h * float(factor)))
+                for pass_w, pass_h in pass_sizes:
+                    if tuple(samples.shape[-2:]) != (pass_h, pass_w):
+                        samples = comfy.utils.common_upscale(samples, pass_w, pass_h, "area", crop="disabled")
+                    samples, tiles = _tiled_upscale(
+                        upscale_model, samples.to(device), scale, device, tile_batch, precision, log=b == 0,
+                    )
+                    tiles_total += tiles
+                    pbar.update(1)
 
-            samples = upscaled.movedim(-1, 1)
-            out = comfy.utils.common_upscale(samples, new_w, new_h, upscale_method, crop="disabled")
-            out = out.movedim(1, -1)
+                if tuple(samples.shape[-2:]) != (new_h, new_w):
+                    samples = comfy.utils.common_upscale(samples, new_w, new_h, upscale_method, crop="disabled")
+                if out is None:
+                    out = torch.empty((batch, new_h, new_w, int(samples.shape[1])), dtype=samples.dtype)
+                out[b] = samples[0].movedim(0, -1).to("cpu")
 
-            return (out.to("cpu"),)
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            print(f"[vsLinx_UpscaleByFactorWithModel] {batch} image(s), {tiles_total} tiles in {elapsed:.2f}s "
+                  f"({tiles_total / elapsed:.1f} tiles/s)")
+            if cache_key is not None:
+                out = _store_upscale(cache_key, out)
+            return (out,)
 
         finally:
-            try:
-                upscale_model.cpu()
-            except Exception:
-                pass
+            if residency != "keep loaded":
+                _unload_model(patcher)
 
 
 NODE_CLASS_MAPPINGS = {
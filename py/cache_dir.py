@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import threading
+
+try:
+    import folder_paths
+except Exception:
+    folder_paths = None
+
+EXTENSION_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def vslinx_cache_dir(*parts: str) -> str:
+    """
+    Returns (and creates) a persistent cache directory for this extension.
+    Uses VSLINX_CACHE_DIR if set, otherwise ComfyUI's user directory, and falls
+    back to a `.cache` folder next to the extension.
+    """
+    base = os.environ.get("VSLINX_CACHE_DIR")
+    if not base:
+        user_dir = None
+        if folder_paths is not None and hasattr(folder_paths, "get_user_directory"):
+            try:
+                user_dir = folder_paths.get_user_directory()
+            except Exception:
+                user_dir = None
+        base = os.path.join(user_dir, "vslinx_cache") if user_dir else os.path.join(EXTENSION_ROOT, ".cache")
+
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# Eviction deletes down to this fraction of the budget, so the next writes
+# don't trigger another directory walk right away.
+EVICT_LOW_WATER = 0.9
+
+_evict_lock = threading.Lock()
+_known_bytes: dict[str, int] = {}
+
+
+def _evict_lru(namespace: str, budget_bytes: int, suffix: str, added_bytes: int = 0):
+    """
+    Deletes the least recently used `suffix` files (by mtime) of a cache
+    namespace until it fits `budget_bytes`. A running total, seeded by the first
+    walk and advanced by `added_bytes`, avoids walking the tree on every write.
+    """
+    with _evict_lock:
+        known = _known_bytes.get(namespace)
+        if known is not None:
+            known += added_bytes
+            _known_bytes[namespace] = known
+            if known <= budget_bytes:
+                return
+
+        entries = []
+        total = 0
+        for dirpath, _dirs, files in os.walk(vslinx_cache_dir(namespace)):
+            for name in files:
+                if not name.endswith(suffix):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+        if total > budget_bytes:
+            target = int(budget_bytes * EVICT_LOW_WATER)
+            for _mtime, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                if total <= target:
+                    break
+        _known_bytes[namespace] = total
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+from email.utils import formatdate
+
+from aiohttp import web
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
+
+
+def _file_validators(st: os.stat_result) -> tuple[str, str]:
+    """Returns (etag, last_modified) for a file, in the same format aiohttp uses."""
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    return etag, formatdate(st.st_mtime, usegmt=True)
+
+
+def _is_not_modified(request: web.Request, etag: str, mtime: float | None = None) -> bool:
+    """
+    Evaluates If-None-Match (preferred) or If-Modified-Since against the
+    given validators.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+    if mtime is not None:
+        try:
+            since = request.if_modified_since
+        except Exception:
+            since = None
+        if since is not None and int(mtime) <= since.timestamp():
+            return True
+    return False
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+from aiohttp import web
+from server import PromptServer
+
+from .http_cache import _etag_matches
+from .thumbnails import _cached_thumb
+from ..nodes.multi_image_select import _input_root, _probe_size, _resolve_input_path
+
+routes = PromptServer.instance.routes
+
+MAX_PATHS = 10000
+
+THUMB_DEFAULT_SIZE = 256
+THUMB_MIN_SIZE = 16
+THUMB_MAX_SIZE = 1024
+
+
+def _file_info(rel: str, root: str) -> dict:
+    info = {"path": rel, "exists": False}
+
+    abs_path = _resolve_input_path(rel, root)
+    if abs_path is None:
+        return info
+
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return info
+
+    info.update(exists=True, size=st.st_size, mtime=st.st_mtime, width=None, height=None)
+    try:
+        info["width"], info["height"] = _probe_size(abs_path)
+    except Exception:
+        pass
+    return info
+
+
+def _files_info(rels: list[str]) -> list[dict]:
+    root = os.path.abspath(_input_root()) + os.sep
+    return [_file_info(rel, root) for rel in rels]
+
+
+@routes.post("/vslinx/input_files")
+async def vslinx_input_files(request: web.Request):
+    try:
+        data = await request.json()
+    except Exception:
+        raise web.HTTPBadRequest(text="Body must be JSON")
+
+    paths = data.get("paths") if isinstance(data, dict) else data
+    if not isinstance(paths, list):
+        raise web.HTTPBadRequest(text="Expected a JSON list of paths")
+    if len(paths) > MAX_PATHS:
+        raise web.HTTPBadRequest(text=f"Too many paths (max {MAX_PATHS})")
+
+    rels = [str(p) for p in paths]
+    loop = asyncio.get_running_loop()
+    files = await loop.run_in_executor(None, _files_info, rels)
+    return web.json_response({"files": files}, headers={"Cache-Control": "no-store"})
+
+
+def _load_thumb(abs_path: str, size: int) -> tuple[bytes, str]:
+    thumb_path, key = _cached_thumb(abs_path, size, "thumbs")
+    with open(thumb_path, "rb") as f:
+        return f.read(), key
+
+
+@routes.get("/vslinx/thumb")
+async def vslinx_thumb(request: web.Request):
+    rel = (request.query.get("path") or "").strip()
+    if not rel:
+        raise web.HTTPBadRequest(text="Missing query parameter: path")
+
+    try:
+        size = int(request.query.get("size") or THUMB_DEFAULT_SIZE)
+    except ValueError:
+        raise web.HTTPBadRequest(text="Invalid size")
+    size = max(THUMB_MIN_SIZE, min(THUMB_MAX_SIZE, size))
+
+    abs_path = _resolve_input_path(rel)
+    if abs_path is None:
+        raise web.HTTPNotFound(text="Image not found")
+
+    loop = asyncio.get_running_loop()
+    try:
+        body, key = await loop.run_in_executor(None, _load_thumb, abs_path, size)
+    except FileNotFoundError:
+        raise web.HTTPNotFound(text="Image not found")
+    except Exception as e:
+        raise web.HTTPUnsupportedMediaType(text=f"Cannot create thumbnail: {e}")
+
+    etag = f'"{key}"'
+    # A `v` (source mtime) in the URL pins the content, so it may be cached forever.
+    cache_control = "private, max-age=31536000, immutable" if request.query.get("v") else "private, max-age=60, must-revalidate"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return web.Response(status=304, headers=headers)
+
+    return web.Response(body=body, content_type="image/webp", headers=headers)
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import quote
 from aiohttp import web
+from PIL import Image
 from server import PromptServer
 import folder_paths
 
+from .http_cache import _file_validators, _is_not_modified
+from .thumbnails import _cached_thumb, _thumb_path
+
 routes = PromptServer.instance.routes
 
 MODEL_EXTS = (".safetensors", ".pt", ".ckpt", ".gguf")
@@ -13,6 +23,27 @@ VID_EXTS = (".mp4", ".webm")
 
 SEARCH_TYPES = ("loras", "checkpoints", "unet", "diffusion_models")
 
+# Browser cache lifetime (seconds) of preview responses and of "no preview" answers.
+PREVIEW_MAX_AGE = 60
+NO_PREVIEW_MAX_AGE = 10
+
+# Bounds for the optional `max_size` (px) of downscaled image preview variants.
+VARIANT_MIN_SIZE = 32
+VARIANT_MAX_SIZE = 2048
+# Size estimate (bytes per pixel) reported for a variant that was not generated
+# yet; WebP q80 previews are typically well below this.
+VARIANT_EST_BYTES_PER_PIXEL = 0.25
+
+# Threads used for preview resolution so slow (network) disks never block the
+# aiohttp event loop.
+RESOLVE_WORKERS = 4
+
+# Maximum number of names accepted by the bulk preview route.
+MAX_BULK_NAMES = 2000
+
+# Minimum seconds between two directory mtime checks of the preview index.
+INDEX_REFRESH_INTERVAL = 10.0
+
 
 def _normalize_name(name: str) -> str:
     name = name.replace("\\", "/").strip()
@@ -81,17 +112,307 @@ def _resolve_model_anywhere(name: str) -> Path | None:
     return None
 
 
-async def _serve_preview_for_model_file(model_file: Path):
+_UNKNOWN = object()
+
+
+class _PreviewIndex:
+    """
+    In-memory index of model name -> preview file (None if the model has no
+    preview) for every model in SEARCH_TYPES. Built from one directory walk in a
+    background thread; rebuilt when a scanned directory's mtime changes, which
+    covers added/removed models and preview files.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previews: dict[str, Path | None] = {}
+        self._dir_mtimes: dict[str, int] = {}
+        self._building = False
+        self._last_check = 0.0
+        self.ready = False
+
+    def lookup(self, name: str):
+        """Returns the preview Path, None for a model without preview, or _UNKNOWN."""
+        self._maybe_refresh()
+        with self._lock:
+            if not self.ready:
+                return _UNKNOWN
+            return self._previews.get(name, _UNKNOWN)
+
+    def start(self):
+        self._spawn(self._build)
+
+    def _spawn(self, target):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=target, name="vslinx-preview-index", daemon=True).start()
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if not self.ready or now - self._last_check < INDEX_REFRESH_INTERVAL:
+            return
+        self._last_check = now
+        self._spawn(self._refresh)
+
+    def _refresh(self):
+        try:
+            if self._roots_changed():
+                self._build(spawned=False)
+        finally:
+            with self._lock:
+                self._building = False
+
+    def _roots_changed(self) -> bool:
+        with self._lock:
+            dir_mtimes = dict(self._dir_mtimes)
+        if {r for r in self._roots() if os.path.isdir(r)} - set(dir_mtimes):
+            return True
+        for d, mtime in dir_mtimes.items():
+            try:
+                if os.stat(d).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    @staticmethod
+    def _roots() -> list[str]:
+        roots: list[str] = []
+        for model_type in SEARCH_TYPES:
+            try:
+                roots.extend(os.path.abspath(r) for r in folder_paths.get_folder_paths(model_type))
+            except Exception:
+                continue
+        return roots
+
+    def _build(self, spawned: bool = True):
+        try:
+            previews: dict[str, Path | None] = {}
+            dir_mtimes: dict[str, int] = {}
+            all_files: dict[str, str] = {}
+
+            for model_type in SEARCH_TYPES:
+                try:
+                    roots = folder_paths.get_folder_paths(model_type)
+                except Exception:
+                    continue
+
+                # Same precedence as _resolve_model_anywhere: exact names first,
+                # then extension-less names by MODEL_EXTS order, per model type.
+                exact: dict[str, Path] = {}
+                stems: dict[str, tuple[int, Path]] = {}
+                for root in roots:
+                    root = os.path.abspath(root)
+                    for dirpath, _dirnames, filenames in os.walk(root, followlinks=True):
+                        try:
+                            dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+                        except OSError:
+                            pass
+                        for fn in filenames:
+                            full = os.path.join(dirpath, fn)
+                            all_files.setdefault(full.lower(), full)
+                        for fn in filenames:
+                            ext = os.path.splitext(fn)[1].lower()
+                            if ext not in MODEL_EXTS:
+                                continue
+                            full = os.path.join(dirpath, fn)
+                            rel = os.path.relpath(full, root).replace(os.sep, "/")
+                            model_file = Path(full)
+                            exact.setdefault(rel, model_file)
+                            rank = MODEL_EXTS.index(ext)
+                            stem = rel[: -len(ext)]
+                            if stem not in stems or rank < stems[stem][0]:
+                                stems[stem] = (rank, model_file)
+
+                for rel, model_file in exact.items():
+                    previews.setdefault(rel, _find_preview_for_model_file(model_file, all_files))
+                for stem, (_rank, model_file) in stems.items():
+                    previews.setdefault(stem, _find_preview_for_model_file(model_file, all_files))
+
+            with self._lock:
+                self._previews = previews
+                self._dir_mtimes = dir_mtimes
+                self.ready = True
+                self._last_check = time.monotonic()
+        except Exception as e:
+            print(f"[vslinx] preview index build failed: {e}")
+        finally:
+            if spawned:
+                with self._lock:
+                    self._building = False
+
+
+def _find_preview_for_model_file(model_file: Path, listing: dict[str, str] | None = None) -> Path | None:
+    """
+    Returns the first existing preview candidate. With `listing` (lower-cased
+    absolute paths from a directory walk mapped to the real paths) no filesystem
+    calls are made and candidates match case-insensitively, like exists() does
+    on Windows and macOS.
+    """
     for candidate in _candidate_paths_for_model(model_file):
-        if candidate.exists():
-            resp = web.FileResponse(
-                path=str(candidate),
-                headers={"Cache-Control": "no-store"},
-            )
-            resp.headers["Content-Type"] = _content_type_for(candidate)
-            return resp
+        if listing is None:
+            if candidate.exists():
+                return candidate
+            continue
+        found = listing.get(str(candidate).lower())
+        if found is not None:
+            return Path(found)
+    return None
+
 
-    return web.Response(status=204, headers={"Cache-Control": "no-store"})
+def _no_preview_response():
+    return web.Response(status=204, headers={"Cache-Control": f"private, max-age={NO_PREVIEW_MAX_AGE}"})
+
+
+def _serve_preview_file(request: web.Request, preview: Path, st: os.stat_result):
+    etag, last_modified = _file_validators(st)
+    headers = {
+        "Cache-Control": f"private, max-age={PREVIEW_MAX_AGE}",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+    if _is_not_modified(request, etag, st.st_mtime):
+        return web.Response(status=304, headers=headers)
+
+    resp = web.FileResponse(path=str(preview), headers=headers)
+    resp.headers["Content-Type"] = _content_type_for(preview)
+    return resp
+
+
+def _resolve_preview(name: str) -> Path | None:
+    """Index lookup, falling back to resolving the model on disk."""
+    preview = PREVIEW_INDEX.lookup(name)
+    if preview is not _UNKNOWN:
+        return preview
+
+    model_file = _resolve_model_anywhere(name)
+    if model_file is None:
+        return None
+    return _find_preview_for_model_file(model_file)
+
+
+def _parse_max_size(value) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="Invalid max_size")
+    if size <= 0:
+        return None
+    return max(VARIANT_MIN_SIZE, min(VARIANT_MAX_SIZE, size))
+
+
+def _variant_dims(preview: Path, max_size: int | None) -> tuple[int, int] | None:
+    """Pixel size of the downscaled variant, or None when the preview is served as is."""
+    if max_size is None or preview.suffix.lower() not in IMG_EXTS:
+        return None
+    with Image.open(preview) as im:
+        w, h = im.size
+    if max(w, h) <= max_size:
+        return None
+    s = max_size / max(w, h)
+    return max(1, round(w * s)), max(1, round(h * s))
+
+
+def _preview_variant(preview: Path, max_size: int | None) -> Path:
+    """
+    Returns a cached WebP downscaled to `max_size` for image previews larger
+    than that, otherwise the preview itself (videos are never resized).
+    """
+    try:
+        if _variant_dims(preview, max_size) is None:
+            return preview
+        thumb_path, _key = _cached_thumb(str(preview), max_size, "previews")
+        return Path(thumb_path)
+    except Exception:
+        return preview
+
+
+def _resolve_preview_file(name: str, max_size: int | None) -> tuple[Path, os.stat_result] | None:
+    """Blocking part of a preview request: resolution, variant and stat."""
+    preview = _resolve_preview(name)
+    if preview is None:
+        return None
+    if max_size is not None:
+        preview = _preview_variant(preview, max_size)
+    try:
+        return preview, preview.stat()
+    except OSError:
+        return None
+
+
+_RESOLVE_EXECUTOR = ThreadPoolExecutor(max_workers=RESOLVE_WORKERS, thread_name_prefix="vslinx_preview")
+_inflight: dict[tuple, asyncio.Future] = {}
+
+
+async def _run_deduped(key: tuple, fn, *args):
+    """
+    Runs `fn(*args)` on the resolve executor. Concurrent calls with the same key
+    share one in-flight job instead of hitting the disk again.
+    """
+    fut = _inflight.get(key)
+    if fut is None:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(_RESOLVE_EXECUTOR, fn, *args)
+        _inflight[key] = fut
+
+        def _done(f, key=key):
+            if _inflight.get(key) is f:
+                del _inflight[key]
+
+        fut.add_done_callback(_done)
+    # shield: a disconnecting client must not cancel the job for other waiters
+    return await asyncio.shield(fut)
+
+
+def _preview_info(name: str, max_size: int | None = None) -> dict:
+    info = {"preview": False}
+
+    name = _normalize_name(name)
+    if not _is_safe_relpath(name):
+        return info
+
+    preview = _resolve_preview(name)
+    if preview is None:
+        return info
+    try:
+        st = preview.stat()
+    except OSError:
+        return info
+
+    url = f"/vslinx/model_preview?name={quote(name, safe='')}&v={st.st_mtime_ns:x}-{st.st_size:x}"
+    if max_size is not None and preview.suffix.lower() in IMG_EXTS:
+        url += f"&max_size={max_size}"
+
+    # Describe what the URL serves: the WebP variant when one applies (its
+    # size estimated until it has been generated), otherwise the file itself.
+    content_type, size = _content_type_for(preview), st.st_size
+    try:
+        dims = _variant_dims(preview, max_size)
+    except Exception:
+        dims = None
+    if dims is not None:
+        content_type = "image/webp"
+        try:
+            size = os.stat(_thumb_path(str(preview), max_size, "previews")[0]).st_size
+        except OSError:
+            size = int(dims[0] * dims[1] * VARIANT_EST_BYTES_PER_PIXEL)
+
+    info.update(
+        preview=True,
+        content_type=content_type,
+        size=size,
+        # `v` changes with the preview file, so the URL can be cached and prefetched.
+        url=url,
+    )
+    return info
+
+
+PREVIEW_INDEX = _PreviewIndex()
+PREVIEW_INDEX.start()
 
 
 @routes.get("/vslinx/model_preview")
@@ -104,8 +425,35 @@ async def vslinx_model_preview(request: web.Request):
     if not _is_safe_relpath(name):
         raise web.HTTPBadRequest(text="Invalid name")
 
-    model_file = _resolve_model_anywhere(name)
-    if model_file is None:
-        return web.Response(status=204, headers={"Cache-Control": "no-store"})
+    max_size = _parse_max_size(request.query.get("max_size"))
+
+    resolved = await _run_deduped(("preview", name, max_size), _resolve_preview_file, name, max_size)
+    if resolved is None:
+        return _no_preview_response()
+
+    preview, st = resolved
+    return _serve_preview_file(request, preview, st)
+
+
+@routes.post("/vslinx/model_previews")
+async def vslinx_model_previews(request: web.Request):
+    try:
+        data = await request.json()
+    except Exception:
+        raise web.HTTPBadRequest(text="Body must be JSON")
+
+    names = data.get("names") if isinstance(data, dict) else data
+    if not isinstance(names, list):
+        raise web.HTTPBadRequest(text="Expected a JSON list of names")
+    if len(names) > MAX_BULK_NAMES:
+        raise web.HTTPBadRequest(text=f"Too many names (max {MAX_BULK_NAMES})")
+
+    max_size = _parse_max_size(data.get("max_size") if isinstance(data, dict) else None)
 
-    return await _serve_preview_for_model_file(model_file)
+    names = [str(n) for n in names]
+    loop = asyncio.get_running_loop()
+    infos = await loop.run_in_executor(_RESOLVE_EXECUTOR, lambda: [_preview_info(n, max_size) for n in names])
+    return web.json_response(
+        {"previews": dict(zip(names, infos))},
+        headers={"Cache-Control": "no-store"},
+    )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+from .cache_dir import _evict_lru, vslinx_cache_dir
+
+THUMB_QUALITY = 80
+# Disk budget (MB) per thumbnail namespace ("thumbs", "previews"); least
+# recently used files are deleted first. 0 disables the limit.
+THUMB_CACHE_MB = int(os.environ.get("VSLINX_THUMB_CACHE_MB", "512") or 0)
+
+
+def _thumb_key(src: str, st: os.stat_result, size: int) -> str:
+    raw = f"{src}|{st.st_mtime_ns}|{st.st_size}|{size}|q{THUMB_QUALITY}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _write_thumb(src: str, out_path: str, size: int):
+    with Image.open(src) as im:
+        if im.format == "JPEG":
+            # Square box, so EXIF orientation does not matter for the draft size.
+            im.draft(None, (size, size))
+        img = ImageOps.exif_transpose(im)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        img.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+
+    fd, tmp = tempfile.mkstemp(suffix=".webp", dir=os.path.dirname(out_path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            img.save(f, format="WEBP", quality=THUMB_QUALITY, method=4)
+        os.replace(tmp, out_path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _thumb_path(src: str, size: int, namespace: str) -> tuple[str, str]:
+    """(thumb_path, key) where the thumbnail of the current `src` version lives; it may not exist yet."""
+    key = _thumb_key(src, os.stat(src), size)
+    return os.path.join(vslinx_cache_dir(namespace, key[:2]), f"{key}.webp"), key
+
+
+def _cached_thumb(src: str, size: int, namespace: str) -> tuple[str, str]:
+    """
+    Returns (thumb_path, key) of a WebP downscaled to fit `size` x `size`.
+    Thumbnails are content-addressed by source path + mtime + file size, so a
+    changed source simply gets a new file; generated once per source version.
+    """
+    out_path, key = _thumb_path(src, size, namespace)
+    if os.path.isfile(out_path):
+        try:
+            os.utime(out_path)  # refresh its LRU age
+        except OSError:
+            pass
+        return out_path, key
+    _write_thumb(src, out_path, size)
+    if THUMB_CACHE_MB > 0:
+        try:
+            added = os.path.getsize(out_path)
+        except OSError:
+            added = 0
+        _evict_lru(namespace, THUMB_CACHE_MB * 1024 * 1024, ".webp", added)
+    return out_path, key
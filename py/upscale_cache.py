@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import weakref
+
+import numpy as np
+import torch
+
+from .cache_dir import _evict_lru, vslinx_cache_dir
+
+UPSCALE_CACHE_MB = int(os.environ.get("VSLINX_UPSCALE_CACHE_MB", "2048") or 0)
+UPSCALE_CACHE_NAMESPACE = "upscales"
+UPSCALE_CACHE_VERSION = 1
+
+_fingerprints: "weakref.WeakKeyDictionary[object, str]" = weakref.WeakKeyDictionary()
+
+
+def _tensor_digest(t: torch.Tensor) -> str:
+    """blake2b over shape, dtype and raw bytes, fed frame by frame (no full-batch copy)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{tuple(t.shape)}|{t.dtype}".encode("utf-8"))
+    t = t.detach()
+    for frame in t if t.dim() > 0 else [t]:
+        h.update(frame.contiguous().cpu().numpy().tobytes())
+    return h.hexdigest()
+
+
+def _model_fingerprint(upscale_model) -> str:
+    """Hash of the model's weights; computed once per model object."""
+    try:
+        cached = _fingerprints.get(upscale_model)
+    except TypeError:
+        cached = None
+    if cached is not None:
+        return cached
+
+    module = getattr(upscale_model, "model", upscale_model)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(type(module).__name__.encode("utf-8"))
+    for name, tensor in sorted(module.state_dict().items()):
+        h.update(f"{name}|{tuple(tensor.shape)}|{tensor.dtype}".encode("utf-8"))
+        h.update(tensor.detach().contiguous().cpu().numpy().tobytes())
+    fp = h.hexdigest()
+    try:
+        _fingerprints[upscale_model] = fp
+    except TypeError:
+        pass
+    return fp
+
+
+def _upscale_cache_key(image: torch.Tensor, upscale_model, **params) -> str:
+    """Content address of one upscale: input pixels, model weights and every output-affecting parameter."""
+    raw = "|".join(
+        [f"v{UPSCALE_CACHE_VERSION}", _tensor_digest(image), _model_fingerprint(upscale_model)]
+        + [f"{k}={params[k]}" for k in sorted(params)]
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(vslinx_cache_dir(UPSCALE_CACHE_NAMESPACE, key[:2]), f"{key}.npz")
+
+
+def _load_cached_upscale(key: str) -> torch.Tensor | None:
+    """Returns the cached [B,H,W,C] float image, or None. A hit refreshes the entry's LRU age."""
+    path = _cache_path(key)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path) as data:
+            arr = data["image"]
+        os.utime(path)
+    except Exception:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return torch.from_numpy(arr.astype(np.float32) / 255.0)
+
+
+def _store_upscale(key: str, image: torch.Tensor) -> torch.Tensor:
+    """
+    Writes `image` as compressed uint8 and returns the 8-bit quantised image, so
+    a cache miss and a later hit give the same pixels downstream.
+    """
+    arr = (image.detach().clamp(0.0, 1.0) * 255.0).round().to(torch.uint8).cpu().numpy()
+    path = _cache_path(key)
+    fd, tmp = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, image=arr)
+        os.replace(tmp, path)
+    except Exception as e:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        print(f"[vslinx] upscale cache write failed: {e}")
+    else:
+        try:
+            added = os.path.getsize(path)
+        except OSError:
+            added = 0
+        _evict(UPSCALE_CACHE_MB * 1024 * 1024, added)
+    return torch.from_numpy(arr.astype(np.float32) / 255.0)
+
+
+def _evict(budget_bytes: int, added_bytes: int = 0):
+    """Deletes least recently used entries (by mtime) until the cache fits the budget."""
+    _evict_lru(UPSCALE_CACHE_NAMESPACE, budget_bytes, ".npz", added_bytes)
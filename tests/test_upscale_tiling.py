@@ -0,0 +1,185 @@
+"""
+Checks the batched tile path and reduced precision of the upscale node against
+the fp32 single-tile-per-call path (comfy.utils.tiled_scale). Only torch is
+needed: `comfy` is stubbed with a reference copy of its 2D tiled_scale, and the
+node module is imported through a stand-in package rooted at this checkout.
+"""
+import importlib
+import itertools
+import math
+import os
+import sys
+import types
+
+import pytest
+import torch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "vslinx_under_test"
+
+
+def _comfy_tiled_scale(samples, function, tile_x=64, tile_y=64, overlap=8, upscale_amount=4, out_channels=3,
+                       output_device="cpu", pbar=None):
+    """comfy.utils.tiled_scale (tiled_scale_multidim) reduced to two dimensions."""
+    tile, dims = (tile_y, tile_x), 2
+    up_size = [round(upscale_amount * d) for d in samples.shape[2:]]
+    output = torch.empty([samples.shape[0], out_channels] + up_size, device=output_device)
+    for b in range(samples.shape[0]):
+        s = samples[b:b + 1]
+        if all(s.shape[d + 2] <= tile[d] for d in range(dims)):
+            output[b:b + 1] = function(s).to(output_device)
+            continue
+        out = torch.zeros([s.shape[0], out_channels] + up_size, device=output_device)
+        out_div = torch.zeros([s.shape[0], out_channels] + up_size, device=output_device)
+        positions = [range(0, s.shape[d + 2] - overlap, tile[d] - overlap) if s.shape[d + 2] > tile[d] else [0]
+                     for d in range(dims)]
+        for it in itertools.product(*positions):
+            s_in = s
+            upscaled = []
+            for d in range(dims):
+                pos = max(0, min(s.shape[d + 2] - overlap, it[d]))
+                length = min(tile[d], s.shape[d + 2] - pos)
+                s_in = s_in.narrow(d + 2, pos, length)
+                upscaled.append(round(upscale_amount * pos))
+            ps = function(s_in).to(output_device)
+            mask = torch.ones_like(ps)
+            for d in range(2, dims + 2):
+                feather = round(upscale_amount * overlap)
+                if feather >= mask.shape[d]:
+                    continue
+                for t in range(feather):
+                    a = (t + 1) / feather
+                    mask.narrow(d, t, 1).mul_(a)
+                    mask.narrow(d, mask.shape[d] - 1 - t, 1).mul_(a)
+            o, o_d = out, out_div
+            for d in range(dims):
+                o = o.narrow(d + 2, upscaled[d], mask.shape[d + 2])
+                o_d = o_d.narrow(d + 2, upscaled[d], mask.shape[d + 2])
+            o.add_(ps * mask)
+            o_d.add_(mask)
+        output[b:b + 1] = out / out_div
+    return output
+
+
+def _comfy_tiled_scale_steps(width, height, tile_x, tile_y, overlap):
+    return math.ceil(height / (tile_y - overlap)) * math.ceil(width / (tile_x - overlap))
+
+
+def _load_upscale_module():
+    comfy = types.ModuleType("comfy")
+    model_management = types.ModuleType("comfy.model_management")
+    model_management.OOM_EXCEPTION = torch.cuda.OutOfMemoryError
+    model_management.get_torch_device = lambda: torch.device("cpu")
+    model_management.get_free_memory = lambda *args, **kwargs: 2 * 1024 ** 3
+    model_management.soft_empty_cache = lambda *args, **kwargs: None
+    model_patcher = types.ModuleType("comfy.model_patcher")
+    model_patcher.ModelPatcher = object
+    utils = types.ModuleType("comfy.utils")
+    utils.tiled_scale = _comfy_tiled_scale
+    utils.get_tiled_scale_steps = _comfy_tiled_scale_steps
+    comfy.model_management, comfy.model_patcher, comfy.utils = model_management, model_patcher, utils
+    sys.modules.setdefault("comfy", comfy)
+    sys.modules.setdefault("comfy.model_management", model_management)
+    sys.modules.setdefault("comfy.model_patcher", model_patcher)
+    sys.modules.setdefault("comfy.utils", utils)
+
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [REPO_ROOT]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.nodes.upscale_by_factor_with_model")
+
+
+up = _load_upscale_module()
+
+OVERLAP = 8
+
+
+class _Model:
+    """2x super-resolution stand-in: conv + pixel shuffle with a sigmoid to keep values in [0, 1]."""
+
+    scale = 2
+
+    def __init__(self, kernel: int):
+        torch.manual_seed(0)
+        self.model = torch.nn.Sequential(
+            torch.nn.Conv2d(3, 12, kernel, padding=kernel // 2),
+            torch.nn.PixelShuffle(2),
+        ).eval()
+
+    def __call__(self, a):
+        return torch.sigmoid(self.model(a))
+
+
+def _image(h: int = 150, w: int = 210) -> torch.Tensor:
+    torch.manual_seed(1)
+    low = torch.rand(2, 3, h // 8 + 1, w // 8 + 1)
+    return torch.nn.functional.interpolate(low, size=(h, w), mode="bilinear")
+
+
+def _single_tile(model, img: torch.Tensor) -> torch.Tensor:
+    with torch.inference_mode():
+        return model(img).float()
+
+
+def _comfy_path(model, img: torch.Tensor, tile: int = 64) -> torch.Tensor:
+    with torch.inference_mode():
+        return _comfy_tiled_scale(img, up._model_fn(model, None), tile_x=tile, tile_y=tile,
+                                  overlap=OVERLAP, upscale_amount=model.scale)
+
+
+def _max_diff(a: torch.Tensor, b: torch.Tensor) -> float:
+    return (a - b).abs().max().item()
+
+
+@pytest.mark.parametrize("tile_batch", [1, 2, 4, 16])
+@pytest.mark.parametrize("size", [(150, 210), (64, 64), (100, 40)])
+def test_batched_tiles_match_comfy_tiled_scale(tile_batch, size):
+    # Same tile placement, clipped edge tiles and blending as comfy; only the grouping differs.
+    model, img = _Model(3), _image(*size)
+    ref = _comfy_path(model, img)
+    out = up._tiled_scale_batched(img, up._model_fn(model, None), 64, OVERLAP, model.scale, tile_batch)
+    assert out.shape == ref.shape
+    assert _max_diff(out, ref) < 1e-5
+
+
+def test_tile_batch_does_not_change_the_tiled_upscale(monkeypatch):
+    # The node's own dispatch: tile_batch=1 goes to comfy.utils.tiled_scale, >1 to the batched path.
+    monkeypatch.setattr(up, "_pick_tile_size", lambda *args, **kwargs: 64)
+    model, img = _Model(3), _image()
+    device = torch.device("cpu")
+    ref, ref_tiles = up._tiled_upscale(model, img, model.scale, device, tile_batch=1, log=False)
+    for tile_batch in (2, 8):
+        out, tiles = up._tiled_upscale(model, img, model.scale, device, tile_batch=tile_batch, log=False)
+        assert tiles == ref_tiles
+        assert _max_diff(out, ref) < 1e-5
+
+
+@pytest.mark.parametrize("tile_batch", [2, 4, 16])
+def test_batched_tiles_match_untiled_for_pointwise_model(tile_batch):
+    model, img = _Model(1), _image()
+    ref = _single_tile(model, img)
+    out = up._tiled_scale_batched(img, up._model_fn(model, None), 64, OVERLAP, model.scale, tile_batch)
+    assert out.shape == ref.shape
+    assert _max_diff(out, ref) < 1e-5
+
+
+@pytest.mark.parametrize("precision, tolerance", [("bf16", 0.01), ("fp16", 0.01)])
+def test_reduced_precision_close_to_fp32(precision, tolerance):
+    # On the CPU fp16 is routed to bf16, so both cases run bf16 autocast here.
+    model, img = _Model(3), _image()
+    dtype = up._autocast_dtype(model, precision, torch.device("cpu"))
+    assert dtype == torch.bfloat16
+    out = up._tiled_scale_batched(img, up._model_fn(model, dtype), 64, OVERLAP, model.scale, 4)
+    assert out.dtype == torch.float32
+    assert _max_diff(out, _comfy_path(model, img)) < tolerance
+
+
+def test_autocast_dtype_respects_model_support():
+    model, cuda = _Model(1), torch.device("cuda")
+    assert up._autocast_dtype(model, "fp16", cuda) == torch.float16
+    assert up._autocast_dtype(model, "fp32", cuda) is None
+    model.supports_half = False
+    model.supports_bfloat16 = False
+    assert up._autocast_dtype(model, "fp16", cuda) is None
+    assert up._autocast_dtype(model, "bf16", cuda) is None
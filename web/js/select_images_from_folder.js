@@ -106,6 +106,16 @@ app.registerExtension({
       return api.apiURL(`/view?${params.toString()}`);
     };
 
+    const THUMB_SIZE = 512;
+    const fileInfoByRel = new Map();
+
+    const thumbURLFromRel = (rel) => {
+      const params = new URLSearchParams({ path: rel, size: String(THUMB_SIZE) });
+      const info = fileInfoByRel.get(rel);
+      if (info?.mtime) params.set("v", `${info.mtime}-${info.size ?? 0}`);
+      return api.apiURL(`/vslinx/thumb?${params.toString()}`);
+    };
+
     const loadImg = (url) =>
       new Promise((resolve, reject) => {
         const img = new Image();
@@ -155,7 +165,33 @@ app.registerExtension({
       return false;
     }
 
+    async function fetchInputFilesInfo(rels) {
+      const resp = await api.fetchApi("/vslinx/input_files", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ paths: rels }),
+        cache: "no-store",
+      });
+      if (!resp.ok) throw new Error(`input_files failed: ${resp.status}`);
+      const data = await resp.json();
+      const files = Array.isArray(data?.files) ? data.files : [];
+      for (const f of files) {
+        if (f?.exists) fileInfoByRel.set(f.path, f);
+        else if (f?.path) fileInfoByRel.delete(f.path);
+      }
+      return files;
+    }
+
     async function filterExistingRels(rels, concurrency = 4) {
+      if (!rels.length) return [];
+      try {
+        const files = await fetchInputFilesInfo(rels);
+        const existing = new Set(files.filter(f => f?.exists).map(f => f.path));
+        return rels.filter(rel => existing.has(rel));
+      } catch {
+        // route unavailable – fall back to probing /view per file
+      }
+
       const kept = [];
       let idx = 0;
       const workers = Array(Math.min(concurrency, rels.length)).fill(0).map(async () => {
@@ -173,9 +209,8 @@ app.registerExtension({
     async function previewFromRels(node, rels) {
       const imgs = [];
       await Promise.allSettled(rels.map(async (rel) => {
-        const url = viewURLFromRel(rel);
         try {
-          const img = await loadImg(url);
+          const img = await loadImg(thumbURLFromRel(rel)).catch(() => loadImg(viewURLFromRel(rel)));
           imgs.push(img);
         } catch {
           // unsupported codec / blocked / transient – ignore
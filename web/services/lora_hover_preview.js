@@ -3,8 +3,23 @@ import { app } from "../../../scripts/app.js";
 const SETTING_ID = "vslinx.modelHoverPreviews";
 let enabled = false;
 
+// Large image previews are served as a downscaled WebP (the popup is ~340px).
+const PREVIEW_MAX_SIZE = 512;
+
 const PREVIEW_URL = (name) =>
-  `/vslinx/model_preview?name=${encodeURIComponent(name)}&t=${Date.now()}`;
+  `/vslinx/model_preview?name=${encodeURIComponent(name)}&max_size=${PREVIEW_MAX_SIZE}`;
+
+const BULK_PREVIEW_URL = "/vslinx/model_previews";
+const BULK_MAX_NAMES = 2000;
+const PREFETCH_MAX_BYTES = 512 * 1024;
+
+// name -> { status, ok, contentType, url?, at }; avoids a HEAD round trip on repeat hovers.
+const PREVIEW_META_TTL_MS = 60 * 1000;
+const previewMeta = new Map();
+
+function isMetaFresh(meta) {
+  return !!meta && Date.now() - meta.at <= PREVIEW_META_TTL_MS;
+}
 
 const MODEL_EXTS = [".safetensors", ".pt", ".ckpt", ".gguf"];
 
@@ -201,28 +216,77 @@ function getModelName(entryEl) {
   return isLikelyModelPath(v) ? v : null;
 }
 
+async function prefetchMenuPreviews(menuEl) {
+  const names = [];
+  menuEl.querySelectorAll(".litemenu-entry").forEach((entry) => {
+    const name = getModelName(entry);
+    if (name && !isMetaFresh(previewMeta.get(name))) names.push(name);
+  });
+  if (!names.length) return;
+
+  let data;
+  try {
+    const resp = await fetch(BULK_PREVIEW_URL, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ names: names.slice(0, BULK_MAX_NAMES), max_size: PREVIEW_MAX_SIZE }),
+    });
+    if (!resp.ok) return;
+    data = await resp.json();
+  } catch {
+    return;
+  }
+
+  const now = Date.now();
+  for (const [name, info] of Object.entries(data?.previews || {})) {
+    if (!info?.preview) {
+      previewMeta.set(name, { status: 204, ok: false, contentType: "", at: now });
+      continue;
+    }
+
+    const contentType = String(info.content_type || "").toLowerCase();
+    previewMeta.set(name, { status: 200, ok: true, contentType, url: info.url, at: now });
+
+    if (contentType.startsWith("image/") && Number(info.size) <= PREFETCH_MAX_BYTES) {
+      const pre = new Image();
+      pre.src = info.url;
+    }
+  }
+}
+
 async function showPreviewFor(name, ev) {
   const token = ++requestToken;
-  const url = PREVIEW_URL(name);
 
   resetMedia();
   hidePopup();
 
-  let resp;
-  try {
-    resp = await fetch(url, { method: "HEAD", cache: "no-store" });
-  } catch {
-    return;
+  let meta = previewMeta.get(name);
+  if (!isMetaFresh(meta)) {
+    let resp;
+    try {
+      resp = await fetch(PREVIEW_URL(name), { method: "HEAD" });
+    } catch {
+      return;
+    }
+    if (!resp) return;
+
+    meta = {
+      status: resp.status,
+      ok: resp.ok,
+      contentType: (resp.headers.get("content-type") || "").toLowerCase(),
+      at: Date.now(),
+    };
+    previewMeta.set(name, meta);
   }
 
   if (token !== requestToken) return;
-  if (!resp) return;
 
-  if (resp.status === 204) return;
+  if (meta.status === 204) return;
 
-  if (!resp.ok) return;
+  if (!meta.ok) return;
 
-  const ct = (resp.headers.get("content-type") || "").toLowerCase();
+  const ct = meta.contentType;
+  const url = meta.url || PREVIEW_URL(name);
 
   if (ct.startsWith("image/")) {
     img.onload = () => {
@@ -272,6 +336,8 @@ function attachHoverHandlers(menuEl) {
   if (menuEl.dataset.vslinxHoverPreviewAttached === "1") return;
   menuEl.dataset.vslinxHoverPreviewAttached = "1";
 
+  if (enabled) requestAnimationFrame(() => prefetchMenuPreviews(menuEl));
+
   menuEl.addEventListener(
     "mouseover",
     (ev) => {